@@ -1,5 +1,16 @@
-from django.contrib import admin
-from .models import Location, Booking
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import PAGE_VAR
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.template.response import TemplateResponse
+from django.utils.html import format_html
+
+from . import caching, images, rollups, search
+from .models import Location, Booking, BookingArchive, DailyOccupancy, OutboundEmail
+from .pagination import EstimatedCountPaginator
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
@@ -10,13 +21,186 @@ class LocationAdmin(admin.ModelAdmin):
 
     def image_preview(self, obj):
         if obj.image:
-            return f'<img src="{obj.image.url}" width="100" style="border-radius: 4px;" />'
+            return format_html(
+                '<img src="{}" width="100" style="border-radius: 4px;" />',
+                images.thumbnail_url(obj.image, obj.image_derivatives),
+            )
         return "Немає зображення"
-    image_preview.allow_tags = True
     image_preview.short_description = "Зображення"
 
+    # сигнали Location теж скидають кеш, але масове видалення шле їх по рядку;
+    # тут — одна інвалідація після коміту на всю дію адмінки
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(caching.invalidate_locations)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(caching.invalidate_locations)
+
+    def get_search_results(self, request, queryset, search_term):
+        # повнотекстовий індекс (booking.search) замість icontains по description;
+        # search_fields лишаються для autocomplete, який теж приходить сюди
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(search.matching_q(search_term)), False
+
+class RelatedAutocompleteFilter(admin.FieldListFilter):
+    """Фільтр за FK з автодоповненням замість списку всіх значень.
+
+    Варіанти підтягує admin autocomplete endpoint (потрібні search_fields в адмінці
+    цільової моделі); сторінка вантажить лише вибране значення, якщо воно є.
+    """
+
+    template = 'admin/booking/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        value = params.get(self.lookup_kwarg)
+        self.value = value[-1] if isinstance(value, list) else value
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.widget = AutocompleteSelect(field, model_admin.admin_site)
+        self.widget.is_required = False
+        # віджет рендерить лише вибране значення — одним запитом по pk
+        self.widget.choices = forms.ModelChoiceField(
+            field.remote_field.model._default_manager.all(), required=False
+        ).choices
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': 'Усі',
+        }
+
+    def rendered_widget(self):
+        return self.widget.render(self.lookup_kwarg, self.value, attrs={
+            'id': f'filter_{self.field_path}',
+            'data-filter-param': self.lookup_kwarg,
+            'style': 'width: 100%',
+        })
+
+
+# Максимум збігів серед користувачів/локацій, за якими шукаються бронювання.
+SEARCH_MATCH_LIMIT = 500
+
+
+def matching_ids(queryset, field, term):
+    """(pk, чи обрізано) рядків, у яких field містить term (PostgreSQL, GIN trigram
+    з міграції 0012) або починається з term (інші бекенди — префіксний пошук)."""
+    lookup = 'icontains' if connection.vendor == 'postgresql' else 'istartswith'
+    matches = queryset.filter(**{f'{field}__{lookup}': term}).values_list('pk', flat=True)
+    ids = list(matches[:SEARCH_MATCH_LIMIT + 1])
+    return ids[:SEARCH_MATCH_LIMIT], len(ids) > SEARCH_MATCH_LIMIT
+
+
+class EstimatedCountMixin:
+    """Список на EstimatedCountPaginator; поточна сторінка — підказка для меж COUNT."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        try:
+            page = max(int(request.GET.get(PAGE_VAR, 1)), 1)
+        except ValueError:
+            page = 1
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, page_hint=page)
+
+
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(EstimatedCountMixin, admin.ModelAdmin):
     list_display = ('user', 'location', 'start_date', 'end_date', 'is_confirmed')
-    list_filter = ('is_confirmed', 'start_date', 'location')
+    list_select_related = ('user', 'location')
+    list_filter = (
+        'is_confirmed',
+        ('location', RelatedAutocompleteFilter),
+        ('user', RelatedAutocompleteFilter),
+    )
+    date_hierarchy = 'start_date'
     search_fields = ('user__username', 'location__title')
+    search_help_text = "Ім'я користувача або назва локації; число — номер бронювання."
+    autocomplete_fields = ('user', 'location')
+
+    @property
+    def media(self):
+        autocomplete = AutocompleteSelect(Booking._meta.get_field('location'), self.admin_site).media
+        return super().media + autocomplete + forms.Media(js=['booking/js/autocomplete_filter.js'])
+
+    def get_search_results(self, request, queryset, search_term):
+        # Замість icontains через JOIN по всій таблиці бронювань: спершу знаходимо
+        # відповідних користувачів і локації (малі таблиці з індексами), далі —
+        # бронювання за індексованими FK.
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        user_ids, users_truncated = matching_ids(User.objects.all(), 'username', term)
+        location_ids, locations_truncated = matching_ids(Location.objects.all(), 'title', term)
+        if users_truncated or locations_truncated:
+            self.message_user(
+                request,
+                f'Забагато користувачів або локацій за «{term}» — враховано лише перші '
+                f'{SEARCH_MATCH_LIMIT}. Уточніть запит.',
+                messages.WARNING,
+            )
+        condition = Q(user_id__in=user_ids) | Q(location_id__in=location_ids)
+        if term.isdigit():
+            condition |= Q(pk=int(term))
+        return queryset.filter(condition), False
+
+
+@admin.register(BookingArchive)
+class BookingArchiveAdmin(EstimatedCountMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'location', 'start_date', 'end_date', 'is_confirmed', 'archived_at')
+    list_select_related = ('user', 'location')
+    list_filter = ('is_confirmed',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    readonly_fields = ('last_error',)
+
+@admin.register(DailyOccupancy)
+class DailyOccupancyAdmin(admin.ModelAdmin):
+    """Дашборд заповненості замість списку рядків: усе рахується з денних зрізів."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        start, end, error = rollups.parse_range(request.GET)
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Заповненість і виручка',
+            'error': error,
+        }
+        if not error:
+            context.update({
+                'start': start,
+                'end': end,
+                'totals': rollups.totals(start, end),
+                'series': rollups.series(start, end, period='month' if (end - start).days > 92 else 'day'),
+                'locations': rollups.by_location(start, end, limit=20),
+            })
+        return TemplateResponse(request, 'admin/booking/occupancy_dashboard.html', context)
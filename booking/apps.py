@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class BookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import checks, signals  # noqa: F401
+
+        if getattr(settings, 'TEMPLATE_MODE', 'debug') == 'production':
+            from . import outbox
+
+            outbox.prepare_templates()
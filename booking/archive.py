@@ -0,0 +1,51 @@
+import datetime
+import time
+
+from django.db import connection, transaction
+
+from .models import Booking, BookingArchive
+
+# Перенесення давно завершених бронювань з Booking у BookingArchive.
+# Кожна пачка — окрема коротка транзакція: вибрати, скопіювати, видалити.
+# Видалення «сире» (без post_delete): денні зрізи й кеш календаря архівація не
+# змінює — історія лишається в DailyOccupancy, а календар показує лише майбутнє.
+# Розділів (partitions) не використовуємо: SQLite їх не має, а окрема таблиця
+# однаково працює на всіх бекендах.
+
+FIELDS = ('id', 'user_id', 'location_id', 'start_date', 'end_date', 'is_confirmed', 'created_at', 'updated_at')
+
+
+def cutoff_for(days, today=None):
+    return (today or datetime.date.today()) - datetime.timedelta(days=days)
+
+
+def archive_chunk(cutoff, chunk_size):
+    """Переносить до chunk_size бронювань з end_date < cutoff. Повертає (кількість, секунди транзакції)."""
+    started = time.perf_counter()
+    with transaction.atomic():
+        candidates = Booking.objects.filter(end_date__lt=cutoff).order_by('pk')
+        if connection.features.has_select_for_update_skip_locked:
+            # рядки, які зараз редагують, забере наступний запуск
+            candidates = candidates.select_for_update(skip_locked=True)
+        rows = list(candidates.values_list(*FIELDS)[:chunk_size])
+        if rows:
+            BookingArchive.objects.bulk_create(
+                [BookingArchive(**dict(zip(FIELDS, row))) for row in rows], ignore_conflicts=True
+            )
+            # _raw_delete — один DELETE без завантаження об'єктів і без сигналів
+            Booking.objects.filter(pk__in=[row[0] for row in rows])._raw_delete(Booking.objects.db)
+    return len(rows), time.perf_counter() - started
+
+
+def archive(cutoff, chunk_size=1000, pause=0.0, max_chunks=None):
+    """Генератор статистики по пачках: (кількість, секунди транзакції). Зупиняється, коли переносити нічого."""
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        moved, seconds = archive_chunk(cutoff, chunk_size)
+        if not moved:
+            return
+        chunks += 1
+        yield moved, seconds
+        if pause:
+            # дає іншим записувачам (особливо на SQLite) захопити блокування між пачками
+            time.sleep(pause)
@@ -0,0 +1,90 @@
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+
+from . import availability, caching, views
+from .models import Location
+from .pagination import KeysetPage, decode_cursor
+from .views import ROOM_LIST_PAGE_SIZE, location_validators, make_etag, not_modified, set_validators
+
+# Async-версії сторінок читання для ASGI (див. AsyncViewsMiddleware).
+# Поведінка й шаблони ті самі, що й у booking.views; під WSGI працюють sync-версії.
+
+
+async def _load_user(request):
+    # base.html читає user.is_authenticated; ледачий request.user у async-контексті
+    # звертався б до БД синхронно, тож завантажуємо його заздалегідь
+    request.user = await request.auser()
+
+
+async def room_list(request):
+    if request.GET.get("q", "").strip():
+        # повнотекстовий пошук — сирий SQL, лише синхронний шлях
+        return await sync_to_async(views.room_list)(request)
+    await _load_user(request)
+    cursor = request.GET.get("after", "")
+    if cursor and decode_cursor(cursor) is None:
+        cursor = ""
+    version = await caching.aget_version(caching.LOCATIONS)
+    etag = make_etag("rooms", version, cursor, request.user.pk)
+    response = not_modified(request, etag, None)
+    if response is not None:
+        return set_validators(request, response, etag, None)
+
+    rooms = KeysetPage(
+        Location.objects.only("pk", "number", "title", "capacity", "price", "updated_at"), cursor, ROOM_LIST_PAGE_SIZE
+    )
+    # якщо фрагмент уже в кеші, шаблон не торкнеться сторінки — не вантажимо її
+    if await cache.aget(make_template_fragment_key("room_list_page", [version, cursor, ""])) is None:
+        await rooms.aload()
+    response = render(request, "room_list.html", {
+        "rooms_list": rooms,
+        "cursor": cursor,
+        "query": "",
+        "locations_version": version,
+    })
+    return set_validators(request, response, etag, None)
+
+
+async def _validators(room, user_id=None):
+    state = await availability.abooking_state(room.pk)
+    return location_validators(room, await caching.aget_version(caching.LOCATIONS), state, user_id)
+
+
+async def _get_location(pk):
+    room = await caching.aget_location(pk)
+    if room is None:
+        raise Http404
+    return room
+
+
+async def location_detail(request, pk):
+    await _load_user(request)
+    room = await _get_location(pk)
+    etag, last_modified = await _validators(room, request.user.pk)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return set_validators(request, response, etag, last_modified)
+
+    ranges = await availability.acached_busy_ranges(room.pk)
+    response = render(request, "location_detail.html", {
+        "room": room,
+        "busy_ranges_json": json.dumps(ranges, cls=DjangoJSONEncoder),
+    })
+    return set_validators(request, response, etag, last_modified)
+
+
+async def location_availability(request, pk):
+    room = await _get_location(pk)
+    etag, last_modified = await _validators(room)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return set_validators(request, response, etag, last_modified)
+    ranges = await availability.acached_busy_ranges(room.pk)
+    return set_validators(request, JsonResponse({"location": room.pk, "busy": ranges}), etag, last_modified)
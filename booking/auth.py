@@ -0,0 +1,107 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from . import caching
+
+# Кеш request.user на рівні процесу: без нього кожен запит з сесією робить
+# окремий SELECT з auth_user.
+#
+# Ключ — (бекенд, id користувача, хеш авторизації з сесії). Зміна пароля змінює
+# хеш, тож старі сесії в кеш не влучають і проходять звичайну перевірку Django
+# (разом з flush сесії). invalidate() скидає записи користувача в цьому процесі
+# й піднімає його версію в кеші default — інші воркери звіряють версію при
+# кожному влучанні, тож це працює лише зі спільним кешем (Redis/Memcached), не
+# з LocMem. Записи живуть USER_CACHE_TIMEOUT секунд; за замовчуванням кеш вимкнено.
+
+_users = OrderedDict()
+_lock = threading.Lock()
+
+
+def _enabled():
+    return getattr(settings, 'USER_CACHE_TIMEOUT', 0) > 0
+
+
+def _version_name(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate(user_id):
+    with _lock:
+        for key in [key for key in _users if key[1] == user_id]:
+            del _users[key]
+    caching.bump_version(_version_name(user_id))
+
+
+def clear():
+    with _lock:
+        _users.clear()
+
+
+def _session_key(request):
+    session = request.session
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return None
+    session_hash = session.get(HASH_SESSION_KEY)
+    if not session_hash or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    return backend_path, user_id, session_hash
+
+
+def get_user(request):
+    """Як django.contrib.auth.get_user, але з кешем процесу для автентифікованих сесій."""
+    key = _session_key(request) if _enabled() else None
+    if key is None:
+        return auth.get_user(request)
+
+    version = caching.get_version(_version_name(key[1]))
+    now = time.monotonic()
+    with _lock:
+        entry = _users.get(key)
+        if entry is not None and entry[1] == version and entry[2] > now:
+            _users.move_to_end(key)
+            # копія: view можуть змінювати request.user, а екземпляр спільний для потоків
+            return copy.copy(entry[0])
+
+    user = auth.get_user(request)
+    if user.is_authenticated and user.get_session_auth_hash() == key[2]:
+        with _lock:
+            _users[key] = (copy.copy(user), version, now + settings.USER_CACHE_TIMEOUT)
+            _users.move_to_end(key)
+            while len(_users) > getattr(settings, 'USER_CACHE_SIZE', 1024):
+                _users.popitem(last=False)
+    return user
+
+
+def _request_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+async def _auser(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(get_user)(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, що бере request.user з booking.auth.get_user."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _request_user(request))
+        request.auser = partial(_auser, request)
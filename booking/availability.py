@@ -0,0 +1,454 @@
+import datetime
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q
+from django.utils.translation import gettext_lazy as _
+
+from . import caching
+
+# Ім'я exclusion-обмеження з міграції 0006 (лише PostgreSQL).
+EXCLUSION_CONSTRAINT = 'booking_no_overlap'
+
+
+# Інтервали бронювань зберігаються як ординали дат (date.toordinal()),
+# межі включні — так само, як у перевірці перетину в Booking.clean.
+
+class IntervalIndex:
+    """Відсортований набір непересічних інтервалів бронювань однієї локації."""
+
+    def __init__(self, intervals=()):
+        self._starts = []
+        self._ends = []
+        for start, end in sorted(intervals):
+            self._starts.append(_ord(start))
+            self._ends.append(_ord(end))
+        self._tree = None
+
+    def __len__(self):
+        return len(self._starts)
+
+    def intervals(self):
+        return [
+            (datetime.date.fromordinal(s), datetime.date.fromordinal(e))
+            for s, e in zip(self._starts, self._ends)
+        ]
+
+    def is_free(self, start, end):
+        start, end = _ord(start), _ord(end)
+        # останній інтервал, що починається не пізніше end
+        i = bisect_right(self._starts, end) - 1
+        return i < 0 or self._ends[i] < start
+
+    def add(self, start, end):
+        if not self.is_free(start, end):
+            return False
+        start, end = _ord(start), _ord(end)
+        i = bisect_left(self._starts, start)
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+        self._tree = None
+        return True
+
+    def next_free_window(self, nights, after):
+        """Найраніша дата заїзду >= after, з якої вільно nights ночей."""
+        after = _ord(after)
+        # заїзд і виїзд займають обидва дні, тому потрібно nights + 1 вільних днів
+        need = nights + 1
+        n = len(self._ends)
+        i = bisect_left(self._ends, after)
+        if i == n:
+            return datetime.date.fromordinal(after)
+        if self._starts[i] - after >= need:
+            return datetime.date.fromordinal(after)
+        j = self._first_gap(i + 1, need)
+        if j is None:
+            return datetime.date.fromordinal(self._ends[-1] + 1)
+        return datetime.date.fromordinal(self._ends[j - 1] + 1)
+
+    # Дерево відрізків з максимумом по проміжках між сусідніми інтервалами:
+    # проміжок j лежить між інтервалами j - 1 та j.
+
+    def _gap(self, j):
+        return self._starts[j] - self._ends[j - 1] - 1
+
+    def _build(self):
+        size = 1
+        while size < max(len(self._starts), 1):
+            size *= 2
+        tree = [0] * (2 * size)
+        for j in range(1, len(self._starts)):
+            tree[size + j] = self._gap(j)
+        for k in range(size - 1, 0, -1):
+            tree[k] = max(tree[2 * k], tree[2 * k + 1])
+        self._tree = (size, tree)
+
+    def _first_gap(self, lo, need):
+        if lo >= len(self._starts):
+            return None
+        if self._tree is None:
+            self._build()
+        size, tree = self._tree
+        return self._descend(tree, 1, 0, size, lo, need)
+
+    def _descend(self, tree, node, left, right, lo, need):
+        if right <= lo or tree[node] < need:
+            return None
+        if right - left == 1:
+            return left
+        mid = (left + right) // 2
+        found = self._descend(tree, 2 * node, left, mid, lo, need)
+        if found is None:
+            found = self._descend(tree, 2 * node + 1, mid, right, lo, need)
+        return found
+
+
+def _ord(value):
+    return value if isinstance(value, int) else value.toordinal()
+
+
+def overlap_q(start_date, end_date):
+    return Q(start_date__lte=end_date) & Q(end_date__gte=start_date)
+
+
+def overlapping(location_id, start_date, end_date, exclude_pk=None):
+    from .models import Booking
+
+    qs = Booking.objects.filter(overlap_q(start_date, end_date), location_id=location_id)
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return qs
+
+
+def is_free(location_id, start_date, end_date, exclude_pk=None):
+    # авторитетна перевірка для запису — один запит по індексу (location, start_date, end_date)
+    return not overlapping(location_id, start_date, end_date, exclude_pk).exists()
+
+
+def free_locations(check_in, check_out, guests=1, min_price=None, max_price=None, order_by='price'):
+    """Активні локації без бронювань, що перетинають [check_in, check_out] — одним запитом."""
+    from .models import Booking, Location
+
+    busy = Booking.objects.filter(overlap_q(check_in, check_out), location=OuterRef('pk'))
+    qs = Location.objects.filter(is_active=True, capacity__gte=guests)
+    if min_price is not None:
+        qs = qs.filter(price__gte=min_price)
+    if max_price is not None:
+        qs = qs.filter(price__lte=max_price)
+    return qs.filter(~Exists(busy)).order_by(order_by, 'pk')
+
+
+def load_index(location_id, since=None):
+    from .models import Booking
+
+    since = since or datetime.date.today()
+    rows = (
+        Booking.objects.filter(location_id=location_id, end_date__gte=since)
+        .order_by('start_date')
+        .values_list('start_date', 'end_date')
+    )
+    return IntervalIndex(rows)
+
+
+def merge_ranges(rows):
+    """Зливає відсортовані за початком інтервали, що перетинаються або стикуються."""
+    merged = []
+    for start, end in rows:
+        if merged and start <= merged[-1][1] + datetime.timedelta(days=1):
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def busy_ranges(location_id, since=None):
+    from .models import Booking
+
+    since = since or datetime.date.today()
+    rows = (
+        Booking.objects.filter(location_id=location_id, end_date__gte=since)
+        .order_by('start_date')
+        .values_list('start_date', 'end_date')
+    )
+    return [[start.isoformat(), end.isoformat()] for start, end in merge_ranges(rows)]
+
+
+# Кеш календаря зайнятості у кеш-бекенді Django (AVAILABILITY_CACHE_ALIAS).
+# Ключ містить дату, тож після півночі запис перераховується; TTL обмежує
+# застарілість, якщо інвалідація з іншого процесу не дійшла.
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _calendar_cache():
+    return caches[getattr(settings, 'AVAILABILITY_CACHE_ALIAS', 'default')]
+
+
+def _calendar_key(location_id, day):
+    return f'availability:{location_id}:{day.isoformat()}'
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def cached_busy_ranges(location_id):
+    today = datetime.date.today()
+    cache = _calendar_cache()
+    key = _calendar_key(location_id, today)
+    ranges = cache.get(key)
+    if ranges is not None:
+        _count('hits')
+        return ranges
+    _count('misses')
+    ranges = busy_ranges(location_id, since=today)
+    cache.set(key, ranges, getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300))
+    return ranges
+
+
+async def acached_busy_ranges(location_id):
+    from .models import Booking
+
+    today = datetime.date.today()
+    cache = _calendar_cache()
+    key = _calendar_key(location_id, today)
+    ranges = await cache.aget(key)
+    if ranges is not None:
+        _count('hits')
+        return ranges
+    _count('misses')
+    rows = (
+        Booking.objects.filter(location_id=location_id, end_date__gte=today)
+        .order_by('start_date')
+        .values_list('start_date', 'end_date')
+    )
+    merged = merge_ranges([row async for row in rows])
+    ranges = [[start.isoformat(), end.isoformat()] for start, end in merged]
+    await cache.aset(key, ranges, getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300))
+    return ranges
+
+
+# Стан бронювань локації для ETag/Last-Modified (booking.views.location_validators):
+# останній updated_at і кількість — скасування видаляє рядок, не змінюючи updated_at
+# інших. Кешується поруч із календарем і скидається разом з ним.
+
+def _state_key(location_id):
+    return f'availability-state:{location_id}'
+
+
+def _state_query(location_id):
+    from .models import Booking
+
+    return Booking.objects.filter(location_id=location_id)
+
+
+def booking_state(location_id):
+    cache = _calendar_cache()
+    state = cache.get(_state_key(location_id))
+    if state is None:
+        state = _state_query(location_id).aggregate(latest=Max('updated_at'), total=Count('pk'))
+        cache.set(_state_key(location_id), state, getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300))
+    return state
+
+
+async def abooking_state(location_id):
+    cache = _calendar_cache()
+    state = await cache.aget(_state_key(location_id))
+    if state is None:
+        state = await _state_query(location_id).aaggregate(latest=Max('updated_at'), total=Count('pk'))
+        await cache.aset(_state_key(location_id), state, getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300))
+    return state
+
+
+# Кеш індексів у межах процесу. Запис дійсний, доки збігаються день і версія
+# локації в спільному кеші (invalidate() її піднімає, тож зміна в одному воркері
+# видна всім), і не довше за AVAILABILITY_CACHE_TIMEOUT — на випадок локального кешу.
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_version(location_id):
+    return f'availability-index:{location_id}'
+
+
+def get_index(location_id):
+    today = datetime.date.today()
+    version = caching.get_version(_index_version(location_id))
+    now = time.monotonic()
+    with _indexes_lock:
+        cached = _indexes.get(location_id)
+    if cached is not None and cached[:2] == (today, version) and cached[2] > now:
+        return cached[3]
+    index = load_index(location_id, since=today)
+    expires = now + getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300)
+    with _indexes_lock:
+        _indexes[location_id] = (today, version, expires, index)
+    return index
+
+
+def invalidate(location_id=None):
+    with _indexes_lock:
+        if location_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(location_id, None)
+    if location_id is not None:
+        caching.bump_version(_index_version(location_id))
+        _calendar_cache().delete_many([
+            _calendar_key(location_id, datetime.date.today()),
+            _state_key(location_id),
+        ])
+
+
+def next_free_window(location_id, nights, after=None):
+    # індекс містить лише бронювання від сьогодні — минуле не розглядаємо
+    today = datetime.date.today()
+    return get_index(location_id).next_free_window(nights, max(after or today, today))
+
+
+# Блокування на рівні однієї локації. На PostgreSQL/MySQL — SELECT ... FOR UPDATE
+# рядка Location, тож бронювання різних кімнат ідуть паралельно.
+# SQLite допускає лише одного writer-а на всю базу, тому там блокування
+# деградує до м'ютекса на базу в межах процесу, а транзакція одразу
+# піднімається до запису (RESERVED), щоб інші процеси чекали busy timeout,
+# а не падали на взаємоблокуванні SHARED -> RESERVED.
+_process_locks = {}
+_process_locks_guard = threading.Lock()
+
+
+def _process_lock(key):
+    with _process_locks_guard:
+        lock = _process_locks.get(key)
+        if lock is None:
+            # RLock: location_lock можна вкладати (view + reserve в одній транзакції)
+            lock = _process_locks[key] = threading.RLock()
+    return lock
+
+
+@contextmanager
+def location_lock(*location_ids):
+    """Блокує одну або кілька локацій до кінця транзакції."""
+    from .models import Location
+
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            # фіксований порядок — дві пакетні транзакції не заблокують одна одну навхрест
+            list(
+                Location.objects.select_for_update().filter(pk__in=location_ids)
+                .order_by('pk').values_list('pk')
+            )
+            yield
+        return
+
+    with _process_lock(connection.alias):
+        with transaction.atomic():
+            Location.objects.filter(pk__in=location_ids).update(is_active=F('is_active'))
+            yield
+
+
+def reserve(user, location_id, start_date, end_date, **fields):
+    """Створює бронювання під блокуванням локації; при перетині — ValidationError."""
+    from .models import Booking
+
+    booking = Booking(
+        user=user, location_id=location_id, start_date=start_date, end_date=end_date, **fields
+    )
+    try:
+        with location_lock(location_id):
+            booking.save()
+    except IntegrityError as exc:
+        if EXCLUSION_CONSTRAINT in str(exc):
+            raise ValidationError(_('Ці дати вже зайняті для локації.'))
+        raise
+    return booking
+
+
+def _batch_errors(items):
+    """Помилки, які видно без БД: порядок дат і перетини всередині самого пакета."""
+    errors = {}
+    by_location = {}
+    for index, (location_id, start_date, end_date) in enumerate(items):
+        if start_date > end_date:
+            errors[index] = _('Дата початку не може бути пізніше дати закінчення.')
+        else:
+            by_location.setdefault(location_id, []).append((start_date, end_date, index))
+    for rows in by_location.values():
+        rows.sort()
+        latest_end = None
+        for start_date, end_date, index in rows:
+            if latest_end is not None and start_date <= latest_end:
+                errors[index] = _('Перетинається з іншим бронюванням цього запиту.')
+            latest_end = end_date if latest_end is None else max(latest_end, end_date)
+    return errors
+
+
+def reserve_many(user, items, **fields):
+    """Бронює кілька (location_id, start_date, end_date) разом — або всі, або жодного.
+
+    Блокуються лише задіяні локації; перетини з наявними бронюваннями
+    перевіряються одним запитом, вставка — одним bulk_create. При відмові —
+    ValidationError зі словником {індекс елемента: [помилки]}.
+    """
+    from . import rollups
+    from .models import Booking, Location
+
+    items = [(int(location_id), start_date, end_date) for location_id, start_date, end_date in items]
+    errors = _batch_errors(items)
+    location_ids = sorted({item[0] for item in items})
+
+    try:
+        with location_lock(*location_ids):
+            active = set(
+                Location.objects.filter(pk__in=location_ids, is_active=True).values_list('pk', flat=True)
+            )
+            pending = []
+            for index, item in enumerate(items):
+                if item[0] not in active:
+                    errors.setdefault(index, _('Локацію не знайдено або вона неактивна.'))
+                elif index not in errors:
+                    pending.append((index, item))
+
+            if pending:
+                taken = {}
+                query = Q()
+                for _index, (location_id, start_date, end_date) in pending:
+                    query |= Q(location_id=location_id) & overlap_q(start_date, end_date)
+                for location_id, start_date, end_date in (
+                    Booking.objects.filter(query).values_list('location_id', 'start_date', 'end_date')
+                ):
+                    taken.setdefault(location_id, []).append((start_date, end_date))
+                for index, (location_id, start_date, end_date) in pending:
+                    if any(s <= end_date and e >= start_date for s, e in taken.get(location_id, ())):
+                        errors[index] = _('Ці дати вже зайняті для локації.')
+
+            if errors:
+                raise ValidationError({str(index): [message] for index, message in sorted(errors.items())})
+
+            bookings = Booking.objects.bulk_create([
+                Booking(user=user, location_id=location_id, start_date=start_date, end_date=end_date, **fields)
+                for location_id, start_date, end_date in items
+            ])
+            # bulk_create не шле post_save — зрізи й кеші оновлюємо так само, як сигнали
+            rollups.add_bookings(bookings)
+            for location_id in location_ids:
+                invalidate(location_id)
+                transaction.on_commit(lambda location_id=location_id: invalidate(location_id))
+    except IntegrityError as exc:
+        if EXCLUSION_CONSTRAINT in str(exc):
+            # невідомо, який саме елемент — помилка на весь пакет, у формі message_dict
+            raise ValidationError({NON_FIELD_ERRORS: [_('Ці дати вже зайняті для локації.')]})
+        raise
+    return bookings
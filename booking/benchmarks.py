@@ -0,0 +1,281 @@
+import asyncio
+import datetime
+import io
+import random
+import sys
+import time
+import tracemalloc
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.utils.crypto import get_random_string
+
+from . import caching
+from .loadtest import summarize
+
+
+# Сценарії: функція (rng, ctx) -> (method, path, data). ctx містить ідентифікатори
+# синтетичних даних, згенерованих перед прогоном.
+
+def _room_list(rng, ctx):
+    return 'GET', '/rooms/', None
+
+
+def _location_detail(rng, ctx):
+    return 'GET', f"/rooms/{rng.choice(ctx['location_ids'])}/", None
+
+
+def _availability(rng, ctx):
+    return 'GET', f"/rooms/{rng.choice(ctx['location_ids'])}/availability/", None
+
+
+def _profile(rng, ctx):
+    return 'GET', '/profile/', None
+
+
+def _booking_create(rng, ctx):
+    start = ctx['today'] + datetime.timedelta(days=rng.randrange(400, 2000))
+    end = start + datetime.timedelta(days=rng.randrange(1, 8))
+    return 'POST', f"/booking/{rng.choice(ctx['location_ids'])}/create/", {
+        'start_time': start.isoformat(),
+        'end_time': end.isoformat(),
+    }
+
+
+SCENARIOS = {
+    'room_list': _room_list,
+    'location_detail': _location_detail,
+    'availability': _availability,
+    'profile': _profile,
+    'booking_create': _booking_create,
+}
+
+
+def build_context(user_id):
+    return {
+        'today': datetime.date.today(),
+        'location_ids': [room.pk for room in caching.active_locations()],
+        'user_id': user_id,
+    }
+
+
+class ClientRunner:
+    """Django test client: повний стек middleware в тому ж потоці."""
+
+    name = 'client'
+    counts_queries = True
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def request(self, method, path, data):
+        if method == 'POST':
+            return self.client.post(path, data).status_code
+        return self.client.get(path).status_code
+
+
+class WSGIRunner:
+    """Виклик WSGI-застосунку config.wsgi напряму, без мережі."""
+
+    name = 'wsgi'
+    counts_queries = True
+
+    def __init__(self, user):
+        from config.wsgi import application
+
+        self.application = application
+        client = Client()
+        client.force_login(user)
+        # тестовий клієнт не перевіряє CSRF, а прямий WSGI-виклик — перевіряє
+        self.csrf = get_random_string(32)
+        cookies = {k: v.value for k, v in client.cookies.items()}
+        cookies[settings.CSRF_COOKIE_NAME] = self.csrf
+        self.cookie = '; '.join(f'{k}={v}' for k, v in cookies.items())
+
+    def request(self, method, path, data):
+        body = urlencode(data or {}).encode() if method == 'POST' else b''
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'testserver',
+            'HTTP_COOKIE': self.cookie,
+            'HTTP_X_CSRFTOKEN': self.csrf,
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        status = []
+        chunks = self.application(environ, lambda s, headers, exc_info=None: status.append(s))
+        try:
+            for _ in chunks:
+                pass
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        return int(status[0].split()[0])
+
+
+class ASGIRunner:
+    """AsyncClient: запит іде через ASGIHandler у циклі asyncio.
+
+    Синхронні view виконуються в іншому потоці, тому запити до БД тут не рахуються.
+    """
+
+    name = 'asgi'
+    counts_queries = False
+
+    def __init__(self, user):
+        client = Client()
+        client.force_login(user)
+        self.client = AsyncClient()
+        self.client.cookies = SimpleCookie(client.cookies)
+
+    def request(self, method, path, data):
+        async def call():
+            if method == 'POST':
+                return await self.client.post(path, data)
+            return await self.client.get(path)
+        return asyncio.run(call()).status_code
+
+
+RUNNERS = {runner.name: runner for runner in (ClientRunner, WSGIRunner, ASGIRunner)}
+
+
+def run_scenario(name, runner, ctx, iterations, warmup=3, seed=0):
+    scenario = SCENARIOS[name]
+    rng = random.Random(seed)
+
+    for _ in range(warmup):
+        runner.request(*scenario(rng, ctx))
+
+    # кількість запитів до БД — окремим проходом через той самий runner
+    with CaptureQueriesContext(connection) as ctx_queries:
+        runner.request(*scenario(rng, ctx))
+    queries = len(ctx_queries.captured_queries) if runner.counts_queries else None
+
+    latencies = []
+    errors = 0
+    for _ in range(iterations):
+        request = scenario(rng, ctx)
+        started = time.perf_counter()
+        status = runner.request(*request)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if status >= 500:
+            errors += 1
+
+    # алокації міряємо окремо: tracemalloc суттєво сповільнює виконання
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(min(iterations, 10)):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            runner.request(*scenario(rng, ctx))
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    result = summarize(latencies)
+    result.update({
+        'queries': queries,
+        'alloc_peak_kb': max(peaks) / 1024 if peaks else 0.0,
+        'errors': errors,
+    })
+    return result
+
+
+def compare(results, baseline, threshold, min_delta_ms=1.0):
+    """Повертає список регресій відносно збереженого baseline.
+
+    min_delta_ms відсікає шум на дуже швидких сценаріях.
+    """
+    regressions = []
+    for key, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(key)
+        if previous is None:
+            continue
+        limit = max(previous['p95_ms'] * (1 + threshold), previous['p95_ms'] + min_delta_ms)
+        if current['p95_ms'] > limit:
+            regressions.append(f"{key}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+        if None not in (current['queries'], previous['queries']) and current['queries'] > previous['queries']:
+            regressions.append(f"{key}: queries {previous['queries']} -> {current['queries']}")
+        if current['errors'] > previous.get('errors', 0):
+            regressions.append(f"{key}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+async def asgi_request(application, path, method='GET'):
+    """Один HTTP-запит до ASGI-застосунку напряму — так само, як його викликає uvicorn."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+    body_sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # клієнт не відключається, доки відповідь не віддано
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    status = None
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            disconnected.set()
+
+    await application(scope, receive, send)
+    return status
+
+
+async def run_asgi_load(application, paths, concurrency, requests_per_worker, seed=0):
+    """concurrency одночасних клієнтів в одному циклі подій. Повертає (зведення, помилки, rps)."""
+    latencies = []
+    errors = 0
+
+    async def worker(index):
+        nonlocal errors
+        rng = random.Random(seed + index)
+        for _ in range(requests_per_worker):
+            path = rng.choice(paths)
+            started = time.perf_counter()
+            status = await asgi_request(application, path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status is None or status >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies), errors, len(latencies) / elapsed if elapsed else 0.0
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.cache import cache
+
+# Бекенди, де кожен процес має власний кеш: інвалідація (версії, видалення
+# ключів) не доходить до інших воркерів.
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared(alias='default'):
+    """Чи спільний кеш alias для всіх воркерів (Redis, Memcached, БД, файли)."""
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_BACKENDS
+
+
+# Лічильники версій для ключів кешу: замість пошуку й видалення всіх
+# залежних записів достатньо збільшити версію — старі ключі просто
+# перестають читатися і вичищаються TTL.
+
+def _key(name):
+    return f'version:{name}'
+
+
+def get_version(name):
+    version = cache.get(_key(name))
+    if version is None:
+        cache.add(_key(name), 1, None)
+        version = cache.get(_key(name), 1)
+    return version
+
+
+def bump_version(name):
+    try:
+        return cache.incr(_key(name))
+    except ValueError:
+        cache.add(_key(name), 2, None)
+        return cache.get(_key(name), 2)
+
+
+async def aget_version(name):
+    version = await cache.aget(_key(name))
+    if version is None:
+        await cache.aadd(_key(name), 1, None)
+        version = await cache.aget(_key(name), 1)
+    return version
+
+
+# Read-through кеш локацій. Локації змінюються лише через адмінку, тож
+# записи живуть довго, а будь-яка зміна просто піднімає версію 'locations'
+# (сигнали Location і LocationAdmin) — і всі ключі стають недосяжними. Інші
+# воркери це бачать лише зі спільним кешем; з локальним TTL короткий (settings).
+LOCATIONS = 'locations'
+
+
+def _timeout():
+    return getattr(settings, 'LOCATION_CACHE_TIMEOUT', 5)
+
+
+def get_location(pk):
+    """Location за pk або None, якщо її немає."""
+    from .models import Location
+
+    key = f'location:{get_version(LOCATIONS)}:{pk}'
+    room = cache.get(key)
+    if room is None:
+        room = Location.objects.filter(pk=pk).first()
+        if room is not None:
+            cache.set(key, room, _timeout())
+    return room
+
+
+async def aget_location(pk):
+    from .models import Location
+
+    key = f'location:{await aget_version(LOCATIONS)}:{pk}'
+    room = await cache.aget(key)
+    if room is None:
+        room = await Location.objects.filter(pk=pk).afirst()
+        if room is not None:
+            await cache.aset(key, room, _timeout())
+    return room
+
+
+def active_locations():
+    """Список активних локацій у порядку pk."""
+    from .models import Location
+
+    key = f'locations:active:{get_version(LOCATIONS)}'
+    rooms = cache.get(key)
+    if rooms is None:
+        rooms = list(Location.objects.filter(is_active=True).order_by('pk'))
+        cache.set(key, rooms, _timeout())
+    return rooms
+
+
+def invalidate_locations():
+    return bump_version(LOCATIONS)
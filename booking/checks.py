@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from . import caching
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.cache',
+)
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    """Кеші, що мають бути спільними для воркерів, не можна вмикати з LocMem."""
+    errors = []
+    session_alias = getattr(settings, 'SESSION_CACHE_ALIAS', 'default')
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES and not caching.is_shared(session_alias):
+        errors.append(Error(
+            f'SESSION_ENGINE={settings.SESSION_ENGINE} потребує спільного кешу, '
+            f"а CACHES['{session_alias}'] локальний для процесу.",
+            hint='Вихід (flush) скидає сесію лише в одному воркері. Налаштуйте CACHE_BACKEND '
+                 '(Redis/Memcached) або SESSION_MODE=db.',
+            id='booking.E001',
+        ))
+    if getattr(settings, 'USER_CACHE_TIMEOUT', 0) > 0 and not caching.is_shared():
+        errors.append(Error(
+            "USER_CACHE_TIMEOUT > 0 потребує спільного CACHES['default'].",
+            hint='Інвалідація користувача не дійде до інших воркерів. Налаштуйте CACHE_BACKEND '
+                 'або USER_CACHE_TIMEOUT=0.',
+            id='booking.E002',
+        ))
+    return errors
@@ -0,0 +1,195 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q, Value
+from django.utils import timezone
+
+# Фіди доступності для партнерських каналів.
+#
+# Зміни (changes) — бронювання, створені чи змінені після курсора (Booking.updated_at),
+# і скасовані (BookingTombstone.deleted_at), впорядковані за (час, вид, id). Курсор —
+# останній відданий ключ, тож рядки з однаковим часом не губляться. Обидві таблиці
+# читаються одним запитом UNION ALL по індексах (updated_at, id) / (deleted_at, id).
+#
+# Зміни молодші за SYNC_FEED_LAG_SECONDS не віддаються: транзакція, що почалась
+# раніше, може закомітити рядок з меншим updated_at уже після відповіді, і курсор
+# його б перескочив. Затримка закриває це лише для транзакцій, коротших за неї, —
+# тому за замовчуванням вона більша за busy timeout SQLite (див. settings).
+#
+# Tombstone зберігаються SYNC_FEED_RETENTION_DAYS днів (prune_tombstones, викликає
+# archive_bookings). Курсор, старший за цей строк, міг пропустити скасування —
+# такий партнер має синхронізуватись заново з порожнього курсора.
+
+BOOKED, CANCELLED = 0, 1
+STATUSES = {BOOKED: 'booked', CANCELLED: 'cancelled'}
+
+
+def page_size():
+    return getattr(settings, 'SYNC_FEED_PAGE_SIZE', 1000)
+
+
+def encode_cursor(changed_at, kind, pk):
+    raw = f'{changed_at.isoformat()}|{kind}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        changed_at, kind, pk = raw.split('|')
+        changed_at = datetime.datetime.fromisoformat(changed_at)
+        kind, pk = int(kind), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if timezone.is_naive(changed_at) or kind not in STATUSES:
+        return None
+    return changed_at, kind, pk
+
+
+def retention_cutoff(days=None):
+    days = getattr(settings, 'SYNC_FEED_RETENTION_DAYS', 365) if days is None else days
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+def is_expired(cursor):
+    return cursor[0] < retention_cutoff()
+
+
+def prune_tombstones(before, chunk_size=1000):
+    """Видаляє tombstone з deleted_at < before пачками. Повертає кількість."""
+    from .models import BookingTombstone
+
+    total = 0
+    while True:
+        old = BookingTombstone.objects.filter(deleted_at__lt=before).order_by('pk')
+        ids = list(old.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        total += BookingTombstone.objects.filter(pk__in=ids)._raw_delete(BookingTombstone.objects.db)
+
+
+def _after(field, kind, cursor):
+    # (field, kind, id) > курсор
+    changed_at, cursor_kind, pk = cursor
+    condition = Q(**{f'{field}__gt': changed_at})
+    if kind > cursor_kind:
+        condition |= Q(**{field: changed_at})
+    elif kind == cursor_kind:
+        condition |= Q(**{field: changed_at, 'pk__gt': pk})
+    return condition
+
+
+def changes(cursor=None, location_id=None, limit=None, until=None):
+    """(рядки, чи є ще) після cursor. Рядок — (час, вид, ключ, id бронювання,
+    локація, заїзд, виїзд, підтверджено)."""
+    from .models import Booking, BookingTombstone
+
+    limit = limit or page_size()
+    until = until or timezone.now() - datetime.timedelta(seconds=getattr(settings, 'SYNC_FEED_LAG_SECONDS', 2))
+    parts = []
+    for model, field, kind, booking_id, confirmed in (
+        (Booking, 'updated_at', BOOKED, F('pk'), F('is_confirmed')),
+        (BookingTombstone, 'deleted_at', CANCELLED, F('booking_id'), Value(False)),
+    ):
+        qs = model.objects.filter(**{f'{field}__lte': until})
+        if location_id is not None:
+            qs = qs.filter(location_id=location_id)
+        if cursor is not None:
+            qs = qs.filter(_after(field, kind, cursor))
+        qs = qs.annotate(
+            changed_at=F(field), kind=Value(kind), key=F('pk'), booking=booking_id, room=F('location_id'),
+            start=F('start_date'), end=F('end_date'), confirmed=confirmed,
+        ).values_list('changed_at', 'kind', 'key', 'booking', 'room', 'start', 'end', 'confirmed')
+        if connection.features.supports_slicing_ordering_in_compound:
+            # кожна частина — впорядкований діапазон індексу з LIMIT
+            qs = qs.order_by(field, 'pk')[:limit + 1]
+        # SQLite не дозволяє LIMIT у частинах, але зливає впорядковані за індексом
+        # частини UNION ALL ліниво й зупиняється на зовнішньому LIMIT
+        parts.append(qs)
+    rows = list(parts[0].union(parts[1], all=True).order_by('changed_at', 'kind', 'key')[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def next_cursor(rows, cursor=''):
+    return encode_cursor(*rows[-1][:3]) if rows else cursor
+
+
+def stream_changes(rows, cursor, has_more):
+    """JSON відповіді фіду змін частинами — без побудови всього тіла в пам'яті."""
+    yield '{"changes": ['
+    for index, (changed_at, kind, _key, booking_id, location_id, start, end, confirmed) in enumerate(rows):
+        item = {
+            'id': booking_id,
+            'location': location_id,
+            'status': STATUSES[kind],
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'is_confirmed': bool(confirmed),
+            'changed_at': changed_at.isoformat(),
+        }
+        yield (',' if index else '') + json.dumps(item, ensure_ascii=False)
+    yield '], ' + json.dumps({'next_cursor': cursor, 'has_more': has_more})[1:]
+
+
+# iCal: поточні й майбутні бронювання локації як події «зайнято» на цілі дні.
+
+def calendar_bookings(location_id, since=None):
+    from .models import Booking
+
+    since = since or datetime.date.today()
+    return (
+        Booking.objects.filter(location_id=location_id, end_date__gte=since)
+        .order_by('start_date')
+        .values_list('pk', 'start_date', 'end_date', 'is_confirmed', 'updated_at')
+        .iterator(chunk_size=2000)
+    )
+
+
+def _escape(text):
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    # RFC 5545: рядки не довші за 75 октетів, продовження починається з пробілу
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, current = [], b''
+    for char in line:
+        piece = char.encode()
+        if len(current) + len(piece) > (75 if not parts else 74):
+            parts.append(current.decode())
+            current = b''
+        current += piece
+    parts.append(current.decode())
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _stamp(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def ical(room, bookings, domain):
+    """Рядки календаря .ics для StreamingHttpResponse."""
+    yield _fold('BEGIN:VCALENDAR')
+    yield _fold('VERSION:2.0')
+    yield _fold('PRODID:-//Booking System//Availability//UK')
+    yield _fold('CALSCALE:GREGORIAN')
+    yield _fold(f'X-WR-CALNAME:{_escape(room.title)}')
+    for pk, start, end, confirmed, updated_at in bookings:
+        yield _fold('BEGIN:VEVENT')
+        yield _fold(f'UID:booking-{pk}@{domain}')
+        yield _fold(f'DTSTAMP:{_stamp(updated_at)}')
+        yield _fold(f'DTSTART;VALUE=DATE:{start:%Y%m%d}')
+        # кінець бронювання включний, DTEND у iCal — ні
+        yield _fold(f'DTEND;VALUE=DATE:{end + datetime.timedelta(days=1):%Y%m%d}')
+        yield _fold('SUMMARY:Зайнято')
+        yield _fold(f"STATUS:{'CONFIRMED' if confirmed else 'TENTATIVE'}")
+        yield _fold('TRANSP:OPAQUE')
+        yield _fold('END:VEVENT')
+    yield _fold('END:VCALENDAR')
@@ -8,3 +8,28 @@ class UserRegisterForm(UserCreationForm):
     class Meta:
         model = User
         fields = ['username', 'email', 'password1', 'password2']
+
+
+class AvailabilitySearchForm(forms.Form):
+    SORT_CHOICES = [
+        ('price', 'Ціна ↑'),
+        ('-price', 'Ціна ↓'),
+        ('capacity', 'Вмістимість ↑'),
+        ('-capacity', 'Вмістимість ↓'),
+        ('title', 'Назва'),
+    ]
+
+    check_in = forms.DateField(label='Дата заїзду')
+    check_out = forms.DateField(label='Дата виїзду')
+    guests = forms.IntegerField(label='Гостей', min_value=1, initial=1)
+    min_price = forms.DecimalField(label='Ціна від', required=False, min_value=0)
+    max_price = forms.DecimalField(label='Ціна до', required=False, min_value=0)
+    sort = forms.ChoiceField(label='Сортування', choices=SORT_CHOICES, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        check_in = cleaned_data.get('check_in')
+        check_out = cleaned_data.get('check_out')
+        if check_in and check_out and check_in > check_out:
+            raise forms.ValidationError('Некоректний діапазон дат.')
+        return cleaned_data
@@ -0,0 +1,125 @@
+import hashlib
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Ширини похідних зображень (px) і формати: WebP для сучасних браузерів, JPEG — запасний.
+WIDTHS = (320, 640, 1024)
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+DERIVED_DIR = 'room_images/derived'
+
+
+def derivative_name(content_hash, width, ext):
+    # хеш вмісту в шляху — файл ніколи не змінюється, тож його можна кешувати назавжди
+    return posixpath.join(DERIVED_DIR, content_hash, f'{width}.{ext}')
+
+
+def build_derivatives(name, storage=None):
+    """Генерує похідні для одного оригіналу. Не звертається до БД,
+    тому придатна для запуску в пулі процесів. Повертає опис похідних."""
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as fh:
+        data = fh.read()
+    content_hash = hashlib.sha256(data).hexdigest()[:16]
+
+    with Image.open(io.BytesIO(data)) as original:
+        original.load()
+        # без збільшення: ширини, більші за оригінал, пропускаємо
+        widths = [w for w in WIDTHS if w < original.width] + [min(original.width, WIDTHS[-1])]
+        widths = sorted(set(widths))
+        for width in widths:
+            height = round(original.height * width / original.width)
+            resized = original.resize((width, height), Image.LANCZOS)
+            for ext, fmt, options in FORMATS:
+                target = derivative_name(content_hash, width, ext)
+                if storage.exists(target):
+                    continue
+                image = resized
+                if fmt == 'JPEG' and image.mode != 'RGB':
+                    image = image.convert('RGB')
+                buffer = io.BytesIO()
+                image.save(buffer, fmt, **options)
+                storage.save(target, ContentFile(buffer.getvalue()))
+
+    return {'source': name, 'hash': content_hash, 'widths': widths}
+
+
+def generate_for_location(location_id):
+    from .models import Location
+
+    location = Location.objects.filter(pk=location_id).only('image').first()
+    if location is None or not location.image:
+        return None
+    derivatives = build_derivatives(location.image.name)
+    save_derivatives(location_id, location.image.name, derivatives)
+    return derivatives
+
+
+def save_derivatives(location_id, source, derivatives):
+    from . import caching
+    from .models import Location
+
+    # update() замість save(): не чіпаємо інші поля й не запускаємо сигнали повторно;
+    # updated_at і версія локацій — щоб кешовані картки й шапки показали нові зображення
+    updated = Location.objects.filter(pk=location_id, image=source).update(
+        image_derivatives=derivatives, updated_at=timezone.now()
+    )
+    if updated:
+        caching.invalidate_locations()
+    return updated
+
+
+_executor = None
+
+
+def _run_in_background(location_id):
+    try:
+        generate_for_location(location_id)
+    except Exception:
+        logger.exception('Не вдалося згенерувати похідні зображення для локації %s', location_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(location_id):
+    """Фонова генерація поза потоком запиту (IMAGE_DERIVATIVES_BACKGROUND=False — одразу)."""
+    global _executor
+    if not getattr(settings, 'IMAGE_DERIVATIVES_BACKGROUND', True):
+        generate_for_location(location_id)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+    _executor.submit(_run_in_background, location_id)
+
+
+def is_current(image, derivatives):
+    return bool(image) and bool(derivatives) and derivatives.get('source') == image.name
+
+
+def derivative_url(derivatives, width, ext):
+    return default_storage.url(derivative_name(derivatives['hash'], width, ext))
+
+
+def srcset(derivatives, ext):
+    return ', '.join(
+        f"{derivative_url(derivatives, width, ext)} {width}w" for width in derivatives['widths']
+    )
+
+
+def thumbnail_url(image, derivatives, ext='jpg'):
+    if is_current(image, derivatives):
+        return derivative_url(derivatives, derivatives['widths'][0], ext)
+    return image.url
@@ -0,0 +1,72 @@
+import random
+import statistics
+import threading
+import time
+
+from django.db import close_old_connections, connection
+from django.test import Client
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies_ms):
+    values = sorted(latencies_ms)
+    return {
+        'count': len(values),
+        'mean_ms': statistics.fmean(values) if values else 0.0,
+        'p50_ms': percentile(values, 50),
+        'p95_ms': percentile(values, 95),
+        'p99_ms': percentile(values, 99),
+        'max_ms': values[-1] if values else 0.0,
+    }
+
+
+def run_concurrent(make_request, threads, requests_per_thread, setup=None, seed=0):
+    """Запускає make_request(client, rng) у кількох потоках, кожен зі своїм Client.
+
+    Повертає (зведення латентності, кількість помилок, requests/sec).
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        client = Client()
+        rng = random.Random(seed + index)
+        try:
+            if setup is not None:
+                setup(client, index)
+            barrier.wait()
+            local = []
+            for _ in range(requests_per_thread):
+                started = time.perf_counter()
+                try:
+                    response = make_request(client, rng)
+                    # 4xx (у т.ч. 429 від ліміту запитів) — теж помилка, а не швидка відповідь
+                    if not 200 <= response.status_code < 400:
+                        raise RuntimeError(f'HTTP {response.status_code}')
+                except Exception as exc:
+                    with lock:
+                        errors.append(repr(exc))
+                    continue
+                local.append((time.perf_counter() - started) * 1000)
+            with lock:
+                latencies.extend(local)
+        finally:
+            close_old_connections()
+            connection.close()
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize(latencies), errors, len(latencies) / elapsed if elapsed else 0.0
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from booking import archive, feeds
+from booking.models import Booking, BookingTombstone
+
+
+class Command(BaseCommand):
+    help = ('Переносить бронювання, що завершились понад --days днів тому, у BookingArchive '
+            'пачками в коротких транзакціях. Для кожної пачки друкує пропускну здатність '
+            'і тривалість транзакції (час утримання блокувань). Також видаляє сліди скасувань '
+            '(BookingTombstone) старші за --tombstone-days.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Пауза між пачками, секунди.')
+        parser.add_argument('--max-chunks', type=int)
+        parser.add_argument('--tombstone-days', type=int, default=settings.SYNC_FEED_RETENTION_DAYS,
+                            help='Скільки днів зберігати сліди скасувань для фіду змін.')
+        parser.add_argument('--dry-run', action='store_true', help='Лише порахувати кандидатів.')
+
+    def handle(self, *args, **options):
+        cutoff = archive.cutoff_for(options['days'])
+        tombstone_cutoff = feeds.retention_cutoff(options['tombstone_days'])
+        if options['dry_run']:
+            count = Booking.objects.filter(end_date__lt=cutoff).count()
+            tombstones = BookingTombstone.objects.filter(deleted_at__lt=tombstone_cutoff).count()
+            self.stdout.write(f'cutoff={cutoff} candidates={count} tombstones={tombstones}')
+            return
+
+        total = 0
+        longest = 0.0
+        started = time.perf_counter()
+        chunks = archive.archive(cutoff, options['chunk_size'], options['pause'], options['max_chunks'])
+        for number, (moved, seconds) in enumerate(chunks, start=1):
+            total += moved
+            longest = max(longest, seconds)
+            self.stdout.write(
+                f'chunk={number} rows={moved} lock_ms={seconds * 1000:.1f} '
+                f'rows/sec={moved / seconds if seconds else 0:.0f}'
+            )
+        elapsed = time.perf_counter() - started
+        pruned = feeds.prune_tombstones(tombstone_cutoff, options['chunk_size'])
+        self.stdout.write(
+            f'cutoff={cutoff} archived={total} elapsed={elapsed:.2f}s '
+            f'rows/sec={total / elapsed if elapsed else 0:.0f} max_lock_ms={longest * 1000:.1f} '
+            f'tombstones_pruned={pruned}'
+        )
@@ -0,0 +1,53 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from booking import images
+from booking.models import Location
+
+
+def _init_worker():
+    # при spawn-старті процесу Django ще не налаштований
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Генерує похідні для всіх наявних зображень паралельно в пулі процесів.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--force', action='store_true', help='Перегенерувати навіть актуальні.')
+
+    def handle(self, *args, **options):
+        pending = [
+            (pk, name)
+            for pk, name, derivatives in Location.objects.exclude(image='').exclude(image__isnull=True)
+            .values_list('pk', 'image', 'image_derivatives')
+            if options['force'] or not derivatives or derivatives.get('source') != name
+        ]
+        if not pending:
+            self.stdout.write('Нічого генерувати.')
+            return
+
+        # з'єднання з БД не можна передавати дочірнім процесам
+        connections.close_all()
+        started = time.perf_counter()
+        done = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            futures = {pool.submit(images.build_derivatives, name): pk for pk, name in pending}
+            for future in as_completed(futures):
+                pk = futures[future]
+                try:
+                    derivatives = future.result()
+                except Exception as exc:
+                    self.stderr.write(f'{pk}: {exc!r}')
+                    continue
+                # воркери працюють лише зі сховищем, у БД пише батьківський процес
+                images.save_derivatives(pk, derivatives['source'], derivatives)
+                done += 1
+        self.stdout.write(f'{done}/{len(pending)} зображень за {time.perf_counter() - started:.1f}s')
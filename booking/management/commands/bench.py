@@ -0,0 +1,96 @@
+import json
+import platform
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from booking import benchmarks, synthetic
+
+
+class Command(BaseCommand):
+    help = ('Відтворюваний бенчмарк сторінок бронювання на окремій тестовій БД із '
+            'синтетичними даними. Результати — JSON; з --baseline падає при регресії.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--bookings', type=int, default=20_000)
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--runner', action='append', choices=sorted(benchmarks.RUNNERS),
+                            help='Можна вказати кілька; за замовчуванням client і wsgi.')
+        parser.add_argument('--scenario', action='append', choices=sorted(benchmarks.SCENARIOS))
+        parser.add_argument('--output', help='Куди записати результати (JSON).')
+        parser.add_argument('--baseline', help='Збережені результати для порівняння.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Допустиме погіршення p95 відносно baseline (0.25 = 25%%).')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+        try:
+            # один користувач шле сотні бронювань — ліміт запитів тут лише заважав би
+            with override_settings(RATE_LIMIT_ENABLED=False):
+                results = self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        payload = json.dumps(results, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(payload)
+        else:
+            self.stdout.write(payload)
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as fh:
+                baseline = json.load(fh)
+            regressions = benchmarks.compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError('Регресія продуктивності:\n' + '\n'.join(regressions))
+            self.stderr.write('Регресій відносно baseline немає.')
+
+    def _run(self, options):
+        synthetic.generate(
+            locations=options['locations'],
+            users=options['users'],
+            bookings=options['bookings'],
+            seed=options['seed'],
+        )
+        user = User.objects.annotate(n=Count('bookings')).order_by('-n', 'pk').first()
+        ctx = benchmarks.build_context(user.pk)
+
+        results = {
+            'meta': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'locations': options['locations'],
+                'users': options['users'],
+                'bookings': options['bookings'],
+                'iterations': options['iterations'],
+                'seed': options['seed'],
+            },
+            'scenarios': {},
+        }
+        for runner_name in options['runner'] or ['client', 'wsgi']:
+            runner = benchmarks.RUNNERS[runner_name](user)
+            for scenario in options['scenario'] or list(benchmarks.SCENARIOS):
+                key = f'{runner_name}:{scenario}'
+                result = benchmarks.run_scenario(
+                    scenario, runner, ctx, options['iterations'], seed=options['seed']
+                )
+                results['scenarios'][key] = result
+                self.stderr.write(
+                    f"{key:<28} p50={result['p50_ms']:7.2f}ms p95={result['p95_ms']:7.2f}ms "
+                    f"p99={result['p99_ms']:7.2f}ms queries={result['queries']!s:>4} "
+                    f"alloc={result['alloc_peak_kb']:8.1f}KB errors={result['errors']}"
+                )
+        return results
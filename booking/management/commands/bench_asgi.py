@@ -0,0 +1,46 @@
+import asyncio
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment,
+)
+
+from booking import benchmarks, synthetic
+from booking.models import Location
+
+
+class Command(BaseCommand):
+    help = ('Порівнює sync- і async-view сторінок читання під ASGI: багато одночасних '
+            'клієнтів в одному циклі подій, як під uvicorn. Дані — у тимчасовій тестовій БД.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=20, help='Запитів на клієнта.')
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--bookings', type=int, default=20_000)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+        try:
+            synthetic.generate(locations=options['locations'], users=50, bookings=options['bookings'])
+            ids = list(Location.objects.values_list('pk', flat=True)[:50])
+            paths = ['/rooms/'] + [f'/rooms/{pk}/' for pk in ids] + [f'/rooms/{pk}/availability/' for pk in ids]
+
+            from config.asgi import application
+
+            for label, async_views in (('sync views', False), ('async views', True)):
+                cache.clear()
+                with override_settings(ASYNC_VIEWS=async_views):
+                    stats, errors, rps = asyncio.run(benchmarks.run_asgi_load(
+                        application, paths, options['concurrency'], options['requests'],
+                    ))
+                self.stdout.write(
+                    f"{label:<12} rps={rps:8.1f} p50={stats['p50_ms']:7.2f}ms "
+                    f"p95={stats['p95_ms']:7.2f}ms p99={stats['p99_ms']:7.2f}ms errors={errors}"
+                )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
@@ -0,0 +1,78 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from booking import auth
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+# запити ланцюжка middleware — ті, що йдуть у django_session і auth_user
+MIDDLEWARE_TABLES = ('"django_session"', '"auth_user"')
+
+
+class Command(BaseCommand):
+    help = ('Запити до БД і час на запит для режимів сесій (SESSION_MODE) з кешем '
+            'користувачів і без нього. Окремо рахуються запити SessionMiddleware і '
+            'AuthenticationMiddleware (django_session, auth_user). Працює на окремій тестовій БД.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--paths', nargs='+', default=['/', '/rooms/', '/profile/'])
+        parser.add_argument('--username', default='bench-auth')
+
+    def handle(self, *args, **options):
+        # testserver у ALLOWED_HOSTS
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+        try:
+            self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, options):
+        user = User.objects.create(username=options['username'])
+        self.stdout.write(f"{'mode':<16}{'user cache':<12}{'path':<12}"
+                          f"{'queries':>9}{'auth+session':>14}{'mean ms':>10}")
+        baseline = {}
+        for mode, engine in ENGINES.items():
+            for timeout in (0, 60):
+                auth.clear()
+                with override_settings(SESSION_ENGINE=engine, USER_CACHE_TIMEOUT=timeout,
+                                       RATE_LIMIT_ENABLED=False):
+                    client = Client()
+                    client.force_login(user)
+                    for path in options['paths']:
+                        total, middleware, mean = self._measure(client, path, options['iterations'])
+                        removed = baseline.setdefault(path, middleware) - middleware
+                        self.stdout.write(
+                            f"{mode:<16}{'on' if timeout else 'off':<12}{path:<12}{total:>9}"
+                            f"{middleware:>14}{mean:>10.2f}" + (f'  (-{removed})' if removed else '')
+                        )
+
+    @staticmethod
+    def _measure(client, path, iterations):
+        # перший запит прогріває кеші сесії й користувача
+        client.get(path)
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(path)
+        # лог запитів скидається на початку кожного запиту — рахуємо одразу
+        queries = [query['sql'] for query in ctx.captured_queries]
+        middleware = sum(1 for sql in queries if any(table in sql for table in MIDDLEWARE_TABLES))
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+        return len(queries), middleware, statistics.fmean(timings)
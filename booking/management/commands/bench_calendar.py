@@ -0,0 +1,86 @@
+import datetime
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from booking.availability import merge_ranges
+
+
+def legacy_busy_dates(rows):
+    busy_dates = []
+    for start, end in rows:
+        current_date = start
+        while current_date <= end:
+            busy_dates.append(current_date.strftime('%Y-%m-%d'))
+            current_date += datetime.timedelta(days=1)
+    return busy_dates
+
+
+def range_busy_dates(rows):
+    return [[start.isoformat(), end.isoformat()] for start, end in merge_ranges(rows)]
+
+
+def synthetic_rows(count, seed=0):
+    rng = random.Random(seed)
+    day = datetime.date.today()
+    rows = []
+    for _ in range(count):
+        day += datetime.timedelta(days=rng.randrange(0, 4))
+        end = day + datetime.timedelta(days=rng.randrange(1, 15))
+        rows.append((day, end))
+        day = end + datetime.timedelta(days=1)
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Порівнює розмір і час побудови календаря location_detail: по днях vs діапазони.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--counts', default='10,100,1000,10000')
+        parser.add_argument('--repeat', type=int, default=20)
+        # кількість клітинок календаря, які flatpickr перевіряє (6 тижнів x 2 поля)
+        parser.add_argument('--cells', type=int, default=84)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'bookings':>9} {'mode':>7} {'bytes':>10} {'build ms':>9} {'cells ms':>9}"
+        )
+        for count in [int(c) for c in options['counts'].split(',')]:
+            rows = synthetic_rows(count)
+            probes = [
+                (rows[0][0] + datetime.timedelta(days=i)).isoformat()
+                for i in range(options['cells'])
+            ]
+            for mode, build, check in (
+                ('days', legacy_busy_dates, lambda data, s: s in data),
+                ('ranges', range_busy_dates, _in_ranges),
+            ):
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    payload = json.dumps(build(rows), cls=DjangoJSONEncoder)
+                build_ms = (time.perf_counter() - started) * 1000 / options['repeat']
+
+                data = json.loads(payload)
+                started = time.perf_counter()
+                for probe in probes:
+                    check(data, probe)
+                cells_ms = (time.perf_counter() - started) * 1000
+
+                self.stdout.write(
+                    f'{count:>9} {mode:>7} {len(payload):>10} {build_ms:>9.3f} {cells_ms:>9.3f}'
+                )
+
+
+def _in_ranges(ranges, date_str):
+    # той самий бінарний пошук, що й isBusy() у location_detail.html
+    lo, hi, found = 0, len(ranges) - 1, -1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if ranges[mid][0] <= date_str:
+            found, lo = mid, mid + 1
+        else:
+            hi = mid - 1
+    return found >= 0 and date_str <= ranges[found][1]
@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.test.utils import setup_databases, teardown_databases
+
+from booking import search
+from booking.loadtest import percentile
+from booking.models import Location
+
+COMMON = (
+    'затишна кімната з балконом видом на море гори парк центр міста тихий двомісний '
+    'люкс сімейний номер ліжко диван кухня душ ванна кондиціонер сніданок парковка '
+    "обслуговування пам'ять ґанок подвір'я камін тераса басейн спортзал сауна wifi"
+).split()
+SYLLABLES = ('ба', 'ві', 'го', 'да', 'жу', 'ко', 'ли', 'ма', 'ні', 'по', 'ри', 'са', 'ту', 'фе', 'хо', 'че')
+ENDINGS = ('ська', 'ний', 'івка', 'ець', 'ова', 'ине')
+
+
+def _vocabulary(rng, size):
+    # назви вулиць, районів, сіл — рідкісні слова, за якими й шукають
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 3))) + rng.choice(ENDINGS))
+    return sorted(words)
+
+
+class Command(BaseCommand):
+    help = ('Бенчмарк повнотекстового пошуку локацій: icontains по title/description '
+            'проти індексу booking.search на окремій тестовій БД із синтетичними локаціями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--vocabulary', type=int, default=5000,
+                            help='Кількість рідкісних слів в описах.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+        try:
+            self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        first = Location.objects.count()
+        rare = _vocabulary(rng, options['vocabulary'])
+        rooms = (
+            Location(
+                number=str(first + i),
+                title=f"{' '.join(rng.sample(COMMON, 2)).capitalize()} {rng.choice(rare)} {first + i}",
+                capacity=rng.randint(1, 6),
+                price=rng.randrange(300, 3000),
+                description=' '.join(rng.choices(COMMON, k=rng.randint(10, 40)) + rng.choices(rare, k=10)),
+            )
+            for i in range(options['locations'])
+        )
+        batch = []
+        for room in rooms:
+            batch.append(room)
+            if len(batch) == 5000:
+                Location.objects.bulk_create(batch)
+                batch = []
+        Location.objects.bulk_create(batch)
+        self.stdout.write(f'seeded in {time.perf_counter() - started:.1f}s')
+        started = time.perf_counter()
+        indexed = search.rebuild()
+        self.stdout.write(f'indexed {indexed} ({search.backend()}) in {time.perf_counter() - started:.1f}s')
+
+        # рідкісне слово, часто недописане, іноді разом із загальним
+        terms = []
+        for _ in range(options['queries']):
+            words = [rng.choice(rare)] + rng.sample(COMMON, rng.randint(0, 1))
+            terms.append(' '.join(word[:max(4, len(word) - rng.randint(0, 2))] for word in words))
+
+        def icontains(term):
+            condition = Q()
+            for word in term.split():
+                condition &= Q(title__icontains=word) | Q(description__icontains=word)
+            return list(Location.objects.filter(condition, is_active=True)
+                        .order_by('title', 'pk').values_list('pk', flat=True)[:search.DEFAULT_LIMIT])
+
+        for name, func in (('icontains', icontains), ('fulltext', search.ranked_ids)):
+            timings = []
+            for term in terms:
+                begin = time.perf_counter()
+                func(term)
+                timings.append((time.perf_counter() - begin) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{name:<10} mean={statistics.fmean(timings):.2f}ms p50={percentile(timings, 50):.2f}ms '
+                f'p95={percentile(timings, 95):.2f}ms'
+            )
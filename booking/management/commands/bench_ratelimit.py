@@ -0,0 +1,71 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from booking import ratelimit
+from booking.loadtest import percentile
+
+
+class _User:
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class Command(BaseCommand):
+    help = ('Накладні витрати ліміту запитів на один запит: view з @ratelimit проти '
+            'того самого view без нього. Падає, якщо середнє перевищує --max-us.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20_000)
+        parser.add_argument('--clients', type=int, default=1000,
+                            help='Кількість різних IP/користувачів, між якими розподілені запити.')
+        parser.add_argument('--max-us', type=float, default=100.0)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = []
+        for i in range(options['clients']):
+            request = factory.post('/booking/1/create/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}')
+            # половина — анонімні (лише ключ IP), половина — з користувачем (IP + user)
+            request.user = _User(i) if i % 2 else AnonymousUser()
+            requests.append(request)
+
+        def view(request):
+            return HttpResponse()
+
+        # бюджет, якого не вичерпати за прогін: міряємо шлях «пропустити»
+        budgets = {'bench': {'rate': f"{options['iterations'] * 10}/h", 'methods': ['POST']}}
+        with override_settings(RATE_LIMITS=budgets, RATE_LIMIT_ENABLED=True):
+            limited = ratelimit.ratelimit('bench')(view)
+            bare = self._measure(view, requests, options['iterations'])
+            wrapped = self._measure(limited, requests, options['iterations'])
+
+        # різниця однакових перцентилів двох прогонів
+        bare.sort()
+        wrapped.sort()
+        mean = statistics.fmean(wrapped) - statistics.fmean(bare)
+        line = [f'mean {mean:.1f}']
+        for pct in (50, 95, 99):
+            line.append(f'p{pct} {percentile(wrapped, pct) - percentile(bare, pct):.1f}')
+        self.stdout.write('overhead per request (µs): ' + '  '.join(line))
+        if mean > options['max_us']:
+            raise CommandError(f"Середні накладні витрати {mean:.1f}µs > {options['max_us']}µs")
+
+    @staticmethod
+    def _measure(view, requests, iterations):
+        timings = []
+        count = len(requests)
+        for i in range(iterations):
+            request = requests[i % count]
+            started = time.perf_counter()
+            response = view(request)
+            timings.append((time.perf_counter() - started) * 1_000_000)
+            if response.status_code != 200:
+                raise CommandError('Ліміт спрацював під час бенчмарку; збільште бюджет.')
+        return timings
@@ -0,0 +1,55 @@
+import datetime
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases
+
+from booking import availability, synthetic
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк пошуку вільних кімнат на окремій тестовій БД із синтетичними даними.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=10_000)
+        parser.add_argument('--bookings', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+        try:
+            self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _run(self, options):
+        started = time.perf_counter()
+        synthetic.generate(
+            locations=options['locations'],
+            users=options['users'],
+            bookings=options['bookings'],
+            seed=options['seed'],
+        )
+        self.stdout.write(f'seeded in {time.perf_counter() - started:.1f}s')
+
+        rng = random.Random(options['seed'])
+        today = datetime.date.today()
+        timings = []
+        for _ in range(options['queries']):
+            check_in = today + datetime.timedelta(days=rng.randrange(0, 365))
+            check_out = check_in + datetime.timedelta(days=rng.randrange(1, 8))
+            qs = availability.free_locations(check_in, check_out, guests=rng.randint(1, 4))
+            started = time.perf_counter()
+            list(qs[:12])
+            timings.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(qs.explain())
+        timings.sort()
+        self.stdout.write(
+            f"queries={len(timings)} p50={statistics.median(timings):.2f}ms "
+            f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms max={timings[-1]:.2f}ms"
+        )
@@ -0,0 +1,122 @@
+import copy
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from booking import availability, synthetic
+from booking.loadtest import percentile
+from booking.models import Booking, Location
+from booking.pagination import KeysetPage
+from booking.views import ROOM_LIST_PAGE_SIZE
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+# режим -> (cached loader, кеш фрагментів)
+MODES = {
+    'uncached': (False, False),
+    'cached': (True, False),
+    'production': (True, True),
+}
+
+
+def _templates(cached):
+    engine = copy.deepcopy(settings.TEMPLATES[0])
+    engine['APP_DIRS'] = False
+    engine['OPTIONS']['debug'] = not cached
+    engine['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', LOADERS)] if cached else LOADERS
+    return [engine]
+
+
+def _caches(fragments):
+    caches = copy.deepcopy(settings.CACHES)
+    # {% cache %} бере аліас 'template_fragments', якщо він є
+    caches['template_fragments'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache' if fragments
+        else 'django.core.cache.backends.dummy.DummyCache',
+        'LOCATION': 'bench-templates',
+    }
+    return caches
+
+
+class Command(BaseCommand):
+    help = ('Час рендерингу шаблонів сторінок і листів на окремій тестовій БД: без кешу '
+            'шаблонів, з cached loader і з cached loader + кешем фрагментів (TEMPLATE_MODE=production).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument('--iterations', type=int, default=300)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=[])
+        try:
+            self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, options):
+        synthetic.generate(locations=options['locations'], users=5, bookings=options['locations'] * 5)
+        user = User.objects.order_by('pk').first()
+        request = RequestFactory().get('/')
+        request.user = user
+        rows = list(
+            Location.objects.only('pk', 'number', 'title', 'capacity', 'price', 'updated_at')
+            .order_by('title', 'pk')[:ROOM_LIST_PAGE_SIZE + 1]
+        )
+        room = Location.objects.order_by('pk').first()
+        busy = json.dumps([[s.isoformat(), e.isoformat()] for s, e in availability.busy_ranges(room.pk)])
+        booking = Booking.objects.select_related('location').first()
+        iteration = iter(range(10 ** 9))
+
+        def room_list():
+            page = KeysetPage(None, '', ROOM_LIST_PAGE_SIZE)
+            page.__dict__['_rows'] = rows
+            # нова версія на кожен рендер: кеш усієї сторінки промахується (як після
+            # зміни будь-якої локації), тож працює лише кеш карток
+            return 'room_list.html', {'rooms_list': page, 'cursor': '', 'locations_version': next(iteration)}
+
+        pages = {
+            'room_list': room_list,
+            'location_detail': lambda: ('location_detail.html', {'room': room, 'busy_ranges_json': busy}),
+            'activation_email': lambda: ('activation_email.html', {
+                'user': user, 'activation_link': 'http://testserver/activate/x/y/'}),
+            'confirmation_email': lambda: ('booking_confirmation_email.html', {'user': user, 'booking': booking}),
+        }
+
+        self.stdout.write(f"{'page':<20}{'mode':<12}{'mean ms':>9}{'p95 ms':>9}{'speedup':>9}")
+        for name, build in pages.items():
+            baseline = None
+            for mode, (cached, fragments) in MODES.items():
+                with override_settings(TEMPLATES=_templates(cached), CACHES=_caches(fragments)):
+                    timings = self._measure(build, request, options['iterations'])
+                mean = statistics.fmean(timings)
+                baseline = baseline or mean
+                self.stdout.write(f"{name:<20}{mode:<12}{mean:>9.3f}{percentile(timings, 95):>9.3f}"
+                                  f"{baseline / mean:>8.1f}x")
+
+    @staticmethod
+    def _measure(build, request, iterations):
+        # перший рендер прогріває loader і кеш фрагментів
+        template_name, context = build()
+        get_template(template_name).render(context, request)
+        timings = []
+        for _ in range(iterations):
+            template_name, context = build()
+            started = time.perf_counter()
+            get_template(template_name).render(context, request)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return timings
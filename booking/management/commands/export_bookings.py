@@ -0,0 +1,51 @@
+import csv
+import json
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking.models import Booking
+
+FIELDS = ['id', 'user', 'location', 'start_date', 'end_date', 'is_confirmed']
+
+
+class Command(BaseCommand):
+    help = 'Потоковий експорт бронювань у CSV/JSONL без завантаження всієї таблиці в пам\'ять.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Файл або '-' для stdout.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'])
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        stream = self.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+
+        rows = (
+            Booking.objects.order_by('pk')
+            .values_list('pk', 'user__username', 'location_id', 'start_date', 'end_date', 'is_confirmed')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        started = time.perf_counter()
+        count = 0
+        try:
+            if fmt == 'csv':
+                writer = csv.writer(stream)
+                writer.writerow(FIELDS)
+                for count, row in enumerate(rows, start=1):
+                    writer.writerow(row)
+            else:
+                for count, row in enumerate(rows, start=1):
+                    stream.write(json.dumps(dict(zip(FIELDS, row)), default=str) + '\n')
+        finally:
+            if path != '-':
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stderr.write(
+            f'exported={count} elapsed={elapsed:.2f}s '
+            f'rows/sec={count / elapsed if elapsed else 0:.0f} peak_rss={peak_mb:.1f}MB'
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from booking import images
+
+
+class Command(BaseCommand):
+    help = 'Генерує похідні зображення (WebP/JPEG, кілька ширин) для вказаних локацій.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('location_ids', nargs='+', type=int)
+
+    def handle(self, *args, **options):
+        for location_id in options['location_ids']:
+            derivatives = images.generate_for_location(location_id)
+            if derivatives is None:
+                self.stderr.write(f'{location_id}: немає зображення')
+            else:
+                self.stdout.write(f"{location_id}: {derivatives['hash']} {derivatives['widths']}")
@@ -0,0 +1,77 @@
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings, setup_test_environment
+
+from booking.loadtest import run_concurrent
+from booking.models import Location, OutboundEmail
+
+PREFIX = 'loadtest-'
+
+
+class Command(BaseCommand):
+    help = ('Навантажувальний тест профілю БД (DB_PROFILE) на шляхах booking_create і '
+            'location_detail. Створює тимчасові кімнати й користувачів із префіксом '
+            f'"{PREFIX}" і видаляє їх наприкінці разом із листами в черзі. Порівняння: '
+            'запустіть з різними DB_PROFILE.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=50, help='Запитів на потік.')
+        parser.add_argument('--rooms', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help='Не видаляти згенеровані дані.')
+
+    def handle(self, *args, **options):
+        # testserver у ALLOWED_HOSTS і locmem-пошта
+        setup_test_environment()
+        threads = options['threads']
+        Location.objects.bulk_create(
+            Location(title=f'{PREFIX}{i}', capacity=2, price=100, description='')
+            for i in range(options['rooms'])
+        )
+        room_ids = list(Location.objects.filter(title__startswith=PREFIX).values_list('pk', flat=True))
+        users = [
+            User.objects.create(username=f'{PREFIX}{i}', email=f'{PREFIX}{i}@example.com')
+            for i in range(threads)
+        ]
+        today = datetime.date.today()
+        # листи-підтвердження, поставлені в чергу під час тесту, видаляються разом з даними
+        outbox_start = OutboundEmail.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+        def login(client, index):
+            client.force_login(users[index])
+
+        def room_detail(client, rng):
+            return client.get(f'/rooms/{rng.choice(room_ids)}/')
+
+        def booking_create(client, rng):
+            start = today + datetime.timedelta(days=rng.randrange(1, 365))
+            end = start + datetime.timedelta(days=rng.randrange(1, 5))
+            return client.post(
+                f'/booking/{rng.choice(room_ids)}/create/',
+                {'start_time': start.isoformat(), 'end_time': end.isoformat()},
+            )
+
+        self.stdout.write(f"profile={settings.DB_PROFILE} threads={threads} requests/thread={options['requests']}")
+        try:
+            for name, scenario in (('location_detail', room_detail), ('booking_create', booking_create)):
+                # ліміт booking_create (20/хв) інакше перетворив би тест на вимір 429-відповідей
+                with override_settings(RATE_LIMIT_ENABLED=False):
+                    stats, errors, rps = run_concurrent(scenario, threads, options['requests'], setup=login)
+                self.stdout.write(
+                    f"{name:<16} rps={rps:8.1f} p50={stats['p50_ms']:7.2f}ms "
+                    f"p95={stats['p95_ms']:7.2f}ms p99={stats['p99_ms']:7.2f}ms errors={len(errors)}"
+                )
+                for error, count in Counter(errors).most_common(3):
+                    self.stdout.write(f'    {count} x {error}')
+        finally:
+            if not options['keep']:
+                Location.objects.filter(title__startswith=PREFIX).delete()
+                User.objects.filter(username__startswith=PREFIX).delete()
+                queued = OutboundEmail.objects.filter(pk__gt=outbox_start).values_list('pk', 'to')
+                OutboundEmail.objects.filter(pk__in=[
+                    pk for pk, to in queued.iterator() if to and all(addr.startswith(PREFIX) for addr in to)
+                ]).delete()
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking import rollups
+
+
+class Command(BaseCommand):
+    help = ('Перераховує денні зрізи DailyOccupancy з таблиці Booking — після масового '
+            'імпорту, ручних правок у БД або для перевірки розбіжностей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--location', type=int, action='append', dest='locations',
+                            help='Лише ці локації (можна кілька разів).')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rollups.rebuild(options['locations'], batch_size=options['batch_size'])
+        self.stdout.write(f'rows={written} elapsed={time.perf_counter() - started:.2f}s')
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from booking import search
+
+
+class Command(BaseCommand):
+    help = ('Перебудовує повнотекстовий індекс локацій (booking.search) — після bulk_create, '
+            'імпорту чи зміни правил нормалізації тексту.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            indexed = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(f'backend={search.backend()} indexed={indexed} '
+                          f'elapsed={time.perf_counter() - started:.2f}s')
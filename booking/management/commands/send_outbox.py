@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking import outbox
+
+
+class Command(BaseCommand):
+    help = 'Розсилає листи з черги OutboundEmail пачками через одне SMTP-з\'єднання.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--lease', type=int, default=60, help='Секунди, на які воркер захоплює пачку.')
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--backoff', type=int, default=30, help='Базова затримка повтору, секунди.')
+        parser.add_argument('--loop', action='store_true', help='Не завершуватись, коли черга порожня.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Пауза, коли черга порожня.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = outbox.send_batch(
+                batch_size=options['batch_size'],
+                lease_seconds=options['lease'],
+                max_attempts=options['max_attempts'],
+                backoff_seconds=options['backoff'],
+            )
+            if sent or failed:
+                self.stdout.write(f'sent={sent} failed={failed}')
+                continue
+            # без --loop розсилаємо, доки є готові до відправки листи
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+import urllib.request
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.templatetags.booking_assets import FLATPICKR_CDN, FLATPICKR_VERSION
+
+FILES = ('flatpickr.min.js', 'flatpickr.min.css')
+TARGET = Path(__file__).resolve().parents[2] / 'static' / 'vendor' / 'flatpickr'
+
+
+class Command(BaseCommand):
+    help = (f'Завантажує Flatpickr {FLATPICKR_VERSION} у booking/static/vendor/flatpickr/, '
+            'щоб сторінки не залежали від CDN. Після цього — collectstatic.')
+
+    def handle(self, *args, **options):
+        TARGET.mkdir(parents=True, exist_ok=True)
+        for filename in FILES:
+            url = FLATPICKR_CDN + filename
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    data = response.read()
+            except OSError as exc:
+                raise CommandError(f'{url}: {exc}')
+            (TARGET / filename).write_bytes(data)
+            self.stdout.write(f'{filename}: {len(data)} bytes')
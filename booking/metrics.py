@@ -0,0 +1,73 @@
+import threading
+from bisect import bisect_left
+
+# Мінімальний реєстр метрик у форматі Prometheus (у межах процесу).
+# Кожен воркер віддає власні значення; агрегує їх сам Prometheus.
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label, value):
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, label):
+        with self._lock:
+            series = self._series.get(label)
+            return None if series is None else (list(series[0]), series[1], series[2])
+
+    def render(self, label_name):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        for label, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_name}="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_name}="{label}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_name}="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{{label_name}="{label}"}} {count}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    'booking_request_duration_seconds', 'Повний час обробки запиту.', SECONDS_BUCKETS)
+DB_SECONDS = Histogram(
+    'booking_db_duration_seconds', 'Сумарний час SQL-запитів за запит.', SECONDS_BUCKETS)
+DB_QUERIES = Histogram(
+    'booking_db_queries', 'Кількість SQL-запитів за запит.', COUNT_BUCKETS)
+TEMPLATE_SECONDS = Histogram(
+    'booking_template_render_seconds', 'Час рендерингу шаблонів за запит.', SECONDS_BUCKETS)
+EMAIL_SECONDS = Histogram(
+    'booking_email_send_seconds', 'Час відправки пошти за запит.', SECONDS_BUCKETS)
+
+HISTOGRAMS = (REQUEST_SECONDS, DB_SECONDS, DB_QUERIES, TEMPLATE_SECONDS, EMAIL_SECONDS)
+
+
+def render_all():
+    from . import availability
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render('view'))
+    stats = availability.cache_stats()
+    lines.append('# HELP booking_availability_cache_total Звернення до кешу календаря.')
+    lines.append('# TYPE booking_availability_cache_total counter')
+    for result, value in sorted(stats.items()):
+        lines.append(f'booking_availability_cache_total{{result="{result}"}} {value}')
+    return '\n'.join(lines) + '\n'
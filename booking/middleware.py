@@ -0,0 +1,205 @@
+import contextvars
+import heapq
+import json
+import os
+import tempfile
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import connection
+from django.template.backends.django import Template
+
+from . import metrics
+
+_current = contextvars.ContextVar('booking_request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds', 'template_seconds', 'email_seconds', 'sql')
+
+    def __init__(self, keep_sql):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.email_seconds = 0.0
+        self.sql = [] if keep_sql else None
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper для кожного з'єднання (див. install_query_recorder).
+
+    Статистика запиту береться з contextvar, тож запити з потоків
+    sync_to_async у async-view теж потрапляють до свого запиту.
+    """
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.sql is not None:
+            stats.sql.append((round(elapsed * 1000, 3), sql))
+
+
+def install_query_recorder(db_connection):
+    if record_query not in db_connection.execute_wrappers:
+        db_connection.execute_wrappers.append(record_query)
+
+
+def _timed(attribute, func):
+    def wrapper(*args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            setattr(stats, attribute, getattr(stats, attribute) + time.perf_counter() - started)
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+def _install_hooks():
+    # Template.render бекенду Django викликається раз на render()/render_to_string(),
+    # вкладені extends/include не рахуються повторно.
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        Template.render = _timed('template_seconds', Template.render)
+        EmailMessage.send = _timed('email_seconds', EmailMessage.send)
+        _hooks_installed = True
+
+
+class SlowRequestLog:
+    """Тримає N найповільніших запитів і переписує файл, коли список змінюється."""
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self._heap = []
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def offer(self, seconds, entry):
+        with self._lock:
+            if len(self._heap) >= self.size and seconds <= self._heap[0][0]:
+                return
+            self._counter += 1
+            item = (seconds, self._counter, entry)
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, item)
+            else:
+                heapq.heapreplace(self._heap, item)
+            entries = [e for _, _, e in sorted(self._heap, reverse=True)]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.slow-requests-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(entries, fh, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
+class PerformanceMiddleware:
+    """Час запиту, SQL, шаблони й пошта по кожному view — у гістограми /metrics.
+
+    PERF_SLOW_LOG (шлях до файлу) вмикає журнал PERF_SLOW_LOG_SIZE найповільніших
+    запитів разом з їхнім SQL. Працює і під WSGI, і під ASGI без перемикання потоків.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        _install_hooks()
+        path = getattr(settings, 'PERF_SLOW_LOG', None)
+        self.slow_log = SlowRequestLog(path, getattr(settings, 'PERF_SLOW_LOG_SIZE', 20)) if path else None
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        install_query_recorder(connection)
+        stats = RequestStats(keep_sql=self.slow_log is not None)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats(keep_sql=self.slow_log is not None)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def _record(self, request, response, stats, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unresolved'
+        metrics.REQUEST_SECONDS.observe(view, elapsed)
+        metrics.DB_SECONDS.observe(view, stats.db_seconds)
+        metrics.DB_QUERIES.observe(view, stats.queries)
+        metrics.TEMPLATE_SECONDS.observe(view, stats.template_seconds)
+        metrics.EMAIL_SECONDS.observe(view, stats.email_seconds)
+
+        if self.slow_log is not None:
+            self.slow_log.offer(elapsed, {
+                'view': view,
+                'path': request.path,
+                'method': request.method,
+                'status': response.status_code,
+                'ms': round(elapsed * 1000, 3),
+                'db_ms': round(stats.db_seconds * 1000, 3),
+                'template_ms': round(stats.template_seconds * 1000, 3),
+                'email_ms': round(stats.email_seconds * 1000, 3),
+                'sql': stats.sql,
+            })
+
+
+class AsyncViewsMiddleware:
+    """Під ASGI підміняє URLconf на config.urls_async (async-версії сторінок читання).
+
+    Під WSGI нічого не робить. ASYNC_VIEWS=False вимикає підміну.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if getattr(settings, 'ASYNC_VIEWS', True):
+            request.urlconf = 'config.urls_async'
+        return await self.get_response(request)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0004_location_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['location', 'start_date', 'end_date'], name='booking_loc_dates_idx'),
+        ),
+    ]
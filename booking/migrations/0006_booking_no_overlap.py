@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+# Exclusion-обмеження гарантує відсутність перетинів на рівні БД.
+# Підтримується лише PostgreSQL (btree_gist); на інших бекендах — no-op,
+# там цілісність забезпечує availability.location_lock.
+
+def add_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        'ALTER TABLE booking_booking ADD CONSTRAINT booking_no_overlap '
+        "EXCLUDE USING gist (location_id WITH =, daterange(start_date, end_date, '[]') WITH &&)"
+    )
+
+
+def drop_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE booking_booking DROP CONSTRAINT IF EXISTS booking_no_overlap')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_booking_location_dates_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_constraint, drop_constraint),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0008_location_active_capacity_price_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0010_booking_user_end_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('confirmed_nights', models.IntegerField(default=0)),
+                ('unconfirmed_nights', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_occupancy', to='booking.location')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='occupancy_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('location', 'day'), name='occupancy_location_day_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Пошук BookingAdmin на PostgreSQL — icontains по username і title. Django генерує
+# UPPER(col::text) LIKE UPPER(%s), тож GIN trigram-індекси будуються саме по цьому
+# виразу. На інших бекендах пошук префіксний і ці індекси не потрібні.
+TRIGRAM_INDEXES = (
+    ('auth_user_username_trgm', 'auth_user', 'username'),
+    ('booking_location_title_trgm', 'booking_location', 'title'),
+)
+
+
+def add_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _table, _column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0011_dailyoccupancy'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['start_date'], name='booking_start_idx'),
+        ),
+        migrations.RunPython(add_trigram_indexes, drop_trigram_indexes),
+    ]
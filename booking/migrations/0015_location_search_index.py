@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:14
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+# Повнотекстовий індекс локацій (booking.search): FTS5 на SQLite, tsvector + GIN
+# на PostgreSQL. Таблиця поза ORM, тож створюється тут напряму і одразу
+# заповнюється наявними локаціями. Нормалізатор — заморожена копія booking.search
+# на момент міграції: зміни в ньому не повинні змінювати те, що робить міграція.
+# Після зміни нормалізатора індекс перебудовує команда rebuild_search_index.
+
+TABLE = 'booking_location_search'
+
+_APOSTROPHES = re.compile(r"(?<=\w)['’ʼ`‘](?=\w)")
+_WORDS = re.compile(r'\w+')
+_FOLD = str.maketrans({'ґ': 'г', 'ё': 'е'})
+_CYRILLIC = re.compile(r'[а-яіїє]')
+_ENDINGS = (
+    'ами', 'ями', 'ові', 'еві', 'єві', 'ого', 'ому', 'ими', 'іми', 'ться',
+    'ий', 'ій', 'ої', 'ою', 'ею', 'єю', 'их', 'іх', 'ів', 'їв', 'ах', 'ях', 'ам', 'ям',
+    'ом', 'ем', 'єм', 'ти', 'ть', 'ся',
+    'а', 'я', 'у', 'ю', 'і', 'ї', 'е', 'є', 'о', 'и', 'ь',
+)
+MIN_STEM = 3
+
+
+def _stem(word):
+    if not _CYRILLIC.search(word):
+        return word
+    for ending in sorted(_ENDINGS, key=len, reverse=True):
+        if len(word) - len(ending) >= MIN_STEM and word.endswith(ending):
+            return word[:-len(ending)]
+    return word
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFC', text or '').lower().translate(_FOLD)
+    terms = []
+    for word in _WORDS.findall(_APOSTROPHES.sub('', text)):
+        terms.append(word)
+        base = _stem(word)
+        if base != word:
+            terms.append(base)
+    return ' '.join(terms)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} '
+            "USING fts5(title, body, tokenize='unicode61 remove_diacritics 0')"
+        )
+        insert = f'INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)'
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+            'location_id bigint PRIMARY KEY REFERENCES booking_location (id) ON DELETE CASCADE '
+            'DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)'
+        )
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS booking_location_search_gin ON {TABLE} USING gin (document)')
+        insert = (
+            f'INSERT INTO {TABLE} (location_id, document) VALUES '
+            "(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B'))"
+        )
+    else:
+        return
+
+    Location = apps.get_model('booking', 'Location')
+    rows = (
+        Location.objects.using(schema_editor.connection.alias)
+        .order_by('pk').values_list('pk', 'title', 'description').iterator(chunk_size=2000)
+    )
+    batch = []
+    with schema_editor.connection.cursor() as cursor:
+        for pk, title, description in rows:
+            batch.append((pk, _normalize(title), _normalize(description)))
+            if len(batch) >= 2000:
+                cursor.executemany(insert, batch)
+                batch = []
+        if batch:
+            cursor.executemany(insert, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0014_location_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
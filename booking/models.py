@@ -1,8 +1,10 @@
 from django.db import models
-from django.db.models import Q, Model  
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+
+from . import availability
 # Create your models here.
 
 class Location(models.Model):
@@ -12,9 +14,13 @@ class Location(models.Model):
     price = models.DecimalField(max_digits=6, decimal_places=2)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # версія для кешу фрагментів шаблонів (картка, шапка сторінки кімнати)
+    updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
     image = models.ImageField(upload_to='room_images/', blank=True, null=True)
+    # опис згенерованих похідних: {'source': ім'я оригіналу, 'hash': ..., 'widths': [...]}
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     
     def __str__(self):
         return self.title
@@ -23,6 +29,9 @@ class Location(models.Model):
         verbose_name = _('Location')
         verbose_name_plural = _('Locations')
         ordering = ['title']
+        indexes = [
+            models.Index(fields=['is_active', 'capacity', 'price'], name='location_search_idx'),
+        ]
 
 class Booking(models.Model):
     user = models.ForeignKey(User, related_name='bookings', on_delete=models.CASCADE)
@@ -37,9 +46,7 @@ class Booking(models.Model):
         if self.start_date > self.end_date:
             raise ValidationError(_('Дата початку не може бути пізніше дати закінчення.'))
 
-        if Booking.objects.filter(location=self.location).exclude(pk=self.pk).filter(
-            Q(start_date__lte=self.end_date) & Q(end_date__gte=self.start_date)
-        ).exists():
+        if not availability.is_free(self.location_id, self.start_date, self.end_date, exclude_pk=self.pk):
             raise ValidationError(_('Ці дати вже зайняті для локації.'))
 
     def save(self, *args, **kwargs):
@@ -47,5 +54,128 @@ class Booking(models.Model):
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.user.username} - {self.location.title} ({self.start_date} до {self.end_date})"
+        # без додаткових запитів: імена беремо лише з уже підвантажених зв'язків
+        user = self.user.username if Booking.user.is_cached(self) else f"user #{self.user_id}"
+        location = self.location.title if Booking.location.is_cached(self) else f"#{self.location_id}"
+        return f"{user} - {location} ({self.start_date} до {self.end_date})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['location', 'start_date', 'end_date'], name='booking_loc_dates_idx'),
+            models.Index(fields=['user', 'end_date'], name='booking_user_end_idx'),
+            models.Index(fields=['start_date'], name='booking_start_idx'),
+            # інкрементний фід booking.feeds: діапазон за updated_at
+            models.Index(fields=['updated_at', 'id'], name='booking_updated_idx'),
+            models.Index(fields=['location', 'updated_at', 'id'], name='booking_loc_updated_idx'),
+        ]
+
+
+
+class BookingArchive(models.Model):
+    """Бронювання, що завершились давно; переносяться з Booking командою archive_bookings.
+
+    pk збігається з pk початкового Booking. Перевірки перетинів і календар
+    працюють лише з Booking, тож архівні рядки їх не сповільнюють.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, related_name='archived_bookings', on_delete=models.CASCADE)
+    location = models.ForeignKey(Location, related_name='archived_bookings', on_delete=models.CASCADE)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    is_confirmed = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.pk} ({self.start_date} до {self.end_date})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'end_date'], name='archive_user_end_idx'),
+        ]
+
+
+class BookingTombstone(models.Model):
+    """Слід видаленого (скасованого) бронювання для фіду змін booking.feeds.
+
+    cancel_booking видаляє Booking фізично — без цього запису партнер не
+    дізнався б, що дати звільнились. Зв'язок з локацією без FK-обмеження:
+    слід має пережити і видалення самої локації.
+    """
+    booking_id = models.BigIntegerField()
+    location = models.ForeignKey(Location, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.booking_id} ({self.start_date} до {self.end_date})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+            models.Index(fields=['location', 'deleted_at', 'id'], name='tombstone_loc_deleted_idx'),
+        ]
+
+
+class DailyOccupancy(models.Model):
+    """Денний зріз по локації: заброньовані ночі та виручка (Location.price x ночі).
+
+    Підтримується інкрементно сигналами Booking (див. booking.rollups);
+    перебудовується командою rebuild_rollups.
+    """
+    location = models.ForeignKey(Location, related_name='daily_occupancy', on_delete=models.CASCADE)
+    day = models.DateField()
+    # IntegerField, а не Positive: розбіжність зрізу не повинна ламати запис бронювань
+    confirmed_nights = models.IntegerField(default=0)
+    unconfirmed_nights = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'day'], name='occupancy_location_day_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='occupancy_day_idx'),
+        ]
 
+    @property
+    def nights(self):
+        return self.confirmed_nights + self.unconfirmed_nights
+
+
+class OutboundEmail(models.Model):
+    """Черга вихідних листів; розсилається командою send_outbox."""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, _('Очікує')),
+        (SENT, _('Надіслано')),
+        (FAILED, _('Помилка')),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    to = models.JSONField()
+    content_subtype = models.CharField(max_length=20, default='html')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True, default='')
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+    class Meta:
+        verbose_name = _('Outbound email')
+        verbose_name_plural = _('Outbound emails')
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
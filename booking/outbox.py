@@ -0,0 +1,131 @@
+import datetime
+import uuid
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+# Шаблони листів. У TEMPLATE_MODE=production вони компілюються під час старту
+# (prepare_templates з BookingConfig.ready) і далі лише рендеряться з кешу loader'а.
+EMAIL_TEMPLATES = (
+    'activation_email.html',
+    'booking_confirmation_email.html',
+    'batch_booking_confirmation_email.html',
+)
+
+
+def prepare_templates():
+    return [get_template(name) for name in EMAIL_TEMPLATES]
+
+
+def enqueue(subject, template_name, context, to):
+    """Кладе лист у чергу. Викликати в тій самій транзакції, що й зміну даних."""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=get_template(template_name).render(context),
+        to=list(to),
+    )
+
+
+def _claimable(now):
+    return Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+
+
+def claim_batch(batch_size, lease_seconds=60):
+    # Захоплення через умовний UPDATE з токеном працює однаково на всіх бекендах:
+    # два воркери не отримають той самий лист, поки діє lease.
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = list(
+        OutboundEmail.objects.filter(_claimable(now), status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+        .order_by('next_attempt_at')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not due:
+        return []
+    OutboundEmail.objects.filter(_claimable(now), pk__in=due).update(
+        claimed_by=token,
+        claimed_until=now + datetime.timedelta(seconds=lease_seconds),
+    )
+    return list(OutboundEmail.objects.filter(claimed_by=token))
+
+
+# Лист належить воркеру, поки claimed_by = його токен. Усі зміни після claim_batch —
+# умовні UPDATE за токеном: якщо lease сплив і лист забрав інший воркер, цей
+# воркер нічого не перезаписує.
+
+def _held(email):
+    return OutboundEmail.objects.filter(pk=email.pk, claimed_by=email.claimed_by)
+
+
+def _renew(email, lease_seconds):
+    """Перевіряє, що lease ще наш, і продовжує його на час відправки."""
+    now = timezone.now()
+    return bool(_held(email).filter(claimed_until__gt=now).update(
+        claimed_until=now + datetime.timedelta(seconds=lease_seconds),
+    ))
+
+
+def _mark_sent(email):
+    return bool(_held(email).update(
+        status=OutboundEmail.SENT,
+        sent_at=timezone.now(),
+        attempts=F('attempts') + 1,
+        claimed_until=None,
+    ))
+
+
+def _mark_failed(email, exc, max_attempts, backoff_seconds):
+    attempts = email.attempts + 1
+    fields = {'attempts': attempts, 'last_error': repr(exc), 'claimed_until': None}
+    if attempts >= max_attempts:
+        fields['status'] = OutboundEmail.FAILED
+    else:
+        delay = backoff_seconds * 2 ** (attempts - 1)
+        fields['next_attempt_at'] = timezone.now() + datetime.timedelta(seconds=delay)
+    return bool(_held(email).update(**fields))
+
+
+def send_batch(batch_size=50, lease_seconds=60, max_attempts=5, backoff_seconds=30):
+    """Надсилає одну пачку через одне SMTP-з'єднання. Повертає (sent, failed)."""
+    emails = claim_batch(batch_size, lease_seconds)
+    if not emails:
+        return 0, 0
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        for email in emails:
+            _mark_failed(email, exc, max_attempts, backoff_seconds)
+        return 0, len(emails)
+
+    sent = failed = 0
+    try:
+        for email in emails:
+            # відправка попередніх листів могла з'їсти lease — цей уже може бути чужим
+            if not _renew(email, lease_seconds):
+                continue
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=None,
+                to=email.to,
+                connection=connection,
+            )
+            message.content_subtype = email.content_subtype
+            try:
+                message.send(fail_silently=False)
+            except Exception as exc:
+                _mark_failed(email, exc, max_attempts, backoff_seconds)
+                failed += 1
+            else:
+                _mark_sent(email)
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
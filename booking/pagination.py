@@ -0,0 +1,130 @@
+import base64
+import binascii
+import json
+from functools import cached_property
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+
+
+def encode_cursor(title, pk):
+    raw = f'{pk}:{title}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        pk, title = raw.split(':', 1)
+        return title, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class KeysetPage:
+    """Сторінка за курсором (title, id) — без OFFSET і без COUNT(*).
+
+    Запит виконується ліниво, при першому зверненні з шаблону, тож якщо
+    фрагмент сторінки взято з кешу, до БД ніхто не звертається.
+    """
+
+    def __init__(self, queryset, cursor, per_page):
+        self.queryset = queryset
+        self.cursor = cursor
+        self.per_page = per_page
+
+    def _page_queryset(self):
+        qs = self.queryset.order_by('title', 'pk')
+        position = decode_cursor(self.cursor) if self.cursor else None
+        if position is not None:
+            title, pk = position
+            qs = qs.filter(Q(title__gt=title) | Q(title=title, pk__gt=pk))
+        return qs[:self.per_page + 1]
+
+    @cached_property
+    def _rows(self):
+        return list(self._page_queryset())
+
+    async def aload(self):
+        """Для async-view: завантажує сторінку заздалегідь, поза шаблоном."""
+        self.__dict__['_rows'] = [row async for row in self._page_queryset()]
+
+    @property
+    def object_list(self):
+        return self._rows[:self.per_page]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return len(self._rows) > self.per_page
+
+    @property
+    def has_previous(self):
+        return bool(self.cursor)
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(last.title, last.pk)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator без повного COUNT(*) на великих таблицях.
+
+    Точна кількість рахується лише до exact_limit рядків (COUNT над LIMIT).
+    Далі — оцінка на PostgreSQL: з pg_class.reltuples (без фільтрів) або з плану
+    EXPLAIN (з фільтрами). На інших бекендах оцінки немає — COUNT над LIMIT
+    розширюється до lookahead_pages сторінок за поточною (page_hint): кожна
+    наступна сторінка досяжна, а порожніх «фантомних» сторінок немає.
+    """
+
+    exact_limit = 10_000
+    lookahead_pages = 10
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, page_hint=1):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.page_hint = page_hint
+
+    def _bounded_count(self, limit):
+        return self.object_list.order_by().values('pk')[:limit + 1].count()
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        bounded = self._bounded_count(self.exact_limit)
+        if bounded <= self.exact_limit:
+            return bounded
+        estimate = self._estimate(qs)
+        if estimate is not None:
+            return max(estimate, bounded)
+        limit = (self.page_hint + self.lookahead_pages) * self.per_page
+        return self._bounded_count(limit) if limit > self.exact_limit else bounded
+
+    @staticmethod
+    def _estimate(qs):
+        connection = connections[qs.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            if not qs.query.where:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [qs.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                # -1 — таблицю ще не аналізували
+                return row[0] if row and row[0] >= 0 else None
+            sql, params = qs.order_by().query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
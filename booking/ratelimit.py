@@ -0,0 +1,197 @@
+import ipaddress
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+# Ліміти запитів за IP і користувачем у кеш-бекенді Django.
+#
+# Лічильник ковзного вікна: кількість у поточному фіксованому вікні плюс
+# частка попереднього, пропорційна тому, скільки воно ще перекриває ковзне
+# вікно. Поточний лічильник збільшується атомарно (cache.incr), тож кілька
+# воркерів зі спільним кешем (Redis/Memcached) бачать один бюджет. Це той самий
+# «токен-бакет» з рівномірним поповненням, але без read-modify-write.
+#
+# Бюджети — у settings.RATE_LIMITS за іменем маршруту:
+#     {'register': {'rate': '10/h', 'methods': ['POST']}}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60); допускається й '10/5m'."""
+    count, _, period = rate.partition('/')
+    multiplier = int(period[:-1]) if len(period) > 1 else 1
+    return int(count), multiplier * PERIODS[period[-1]]
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+def _cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')]
+
+
+def _budget(scope):
+    budget = getattr(settings, 'RATE_LIMITS', {}).get(scope)
+    if budget is None:
+        return None
+    return parse_rate(budget['rate']), budget.get('methods')
+
+
+def _incr(cache, key, ttl):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # ключа ще немає; add атомарний, тож з двох воркерів створить лише один
+        if cache.add(key, 1, ttl):
+            return 1
+        return cache.incr(key)
+
+
+def hit(scope, identities, limit, period, now=None):
+    """Рахує запит для кожної ідентичності; RateLimited, якщо хоч одна вичерпала бюджет."""
+    cache = _cache()
+    now = time.time() if now is None else now
+    window = int(now // period)
+    elapsed = now - window * period
+    # попереднє вікно має дожити до кінця поточного
+    ttl = 2 * period
+
+    previous = cache.get_many([f'ratelimit:{scope}:{ident}:{window - 1}' for ident in identities])
+    retry_after = 0
+    for ident in identities:
+        current = _incr(cache, f'ratelimit:{scope}:{ident}:{window}', ttl)
+        before = previous.get(f'ratelimit:{scope}:{ident}:{window - 1}', 0)
+        weight = (period - elapsed) / period
+        if current + before * weight <= limit:
+            continue
+        if current > limit:
+            # лише поточне вікно вже понад ліміт — чекати до його кінця
+            wait = period - elapsed
+        else:
+            # коли частка попереднього вікна зменшиться достатньо
+            wait = period * (1 - (limit - current) / before) - elapsed
+        retry_after = max(retry_after, math.ceil(wait))
+    if retry_after:
+        raise RateLimited(max(retry_after, 1))
+
+
+def _trusted(address, proxies):
+    try:
+        ip = ipaddress.ip_address(address.strip())
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_ip(request):
+    """IP клієнта. X-Forwarded-For читається, лише якщо запит прийшов від довіреного
+    проксі (RATE_LIMIT_TRUSTED_PROXIES): справа наліво, до першої недовіреної адреси."""
+    remote = request.META.get('REMOTE_ADDR') or 'unknown'
+    proxies = [
+        ipaddress.ip_network(proxy, strict=False) for proxy in getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', ())
+    ]
+    if not proxies or not _trusted(remote, proxies):
+        return remote
+    forwarded = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _trusted(hop, proxies):
+            return hop
+    # усі адреси ланцюжка — наші проксі; найлівіша найближча до клієнта
+    return forwarded[0] if forwarded else remote
+
+
+def identities(request):
+    # анонімні запити — лише за IP; користувачі — і за IP, і за id, щоб
+    # ні зміна адреси, ні спільний NAT не обходили бюджет
+    keys = [f'ip:{client_ip(request)}']
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        keys.append(f'user:{user.pk}')
+    return keys
+
+
+def check(request, scope):
+    """None або відповідь 429 для запиту в межах бюджету scope."""
+    if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+        return None
+    budget = _budget(scope)
+    if budget is None:
+        return None
+    (limit, period), methods = budget
+    if methods and request.method not in methods:
+        return None
+    try:
+        hit(scope, identities(request), limit, period)
+    except RateLimited as exc:
+        return too_many_requests(exc.retry_after)
+    return None
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Забагато запитів. Спробуйте пізніше.', status=429, content_type='text/plain; charset=utf-8'
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(scope):
+    """Декоратор view: бюджет береться з settings.RATE_LIMITS[scope]."""
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                limited = await sync_to_async(check)(request, scope)
+                if limited is not None:
+                    return limited
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                limited = check(request, scope)
+                if limited is not None:
+                    return limited
+                return view(request, *args, **kwargs)
+        # RateLimitMiddleware не рахує такі view вдруге
+        wrapper.rate_limit_scope = scope
+        return wrapper
+
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Застосовує RATE_LIMITS до маршрутів за іменем (url_name), зокрема до
+    class-based view на кшталт login, які незручно декорувати."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(view_func, 'rate_limit_scope'):
+            return None
+        return check(request, request.resolver_match.url_name)
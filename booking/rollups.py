@@ -0,0 +1,192 @@
+import datetime
+import heapq
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+
+from .models import Booking, BookingArchive, DailyOccupancy, Location
+
+# Денні зрізи зайнятості (DailyOccupancy). Бронювання [start_date, end_date]
+# дає ночі start_date .. end_date - 1 (заїзд і виїзд в один день — одна ніч),
+# виручка ночі — поточна Location.price. Зміна ціни перераховує зрізи локації.
+
+
+def nights(start_date, end_date):
+    return max((end_date - start_date).days, 1)
+
+
+def _days(start_date, end_date):
+    return [start_date + datetime.timedelta(days=i) for i in range(nights(start_date, end_date))]
+
+
+def apply(location_id, start_date, end_date, is_confirmed, sign, price=None):
+    """Додає (sign=1) або віднімає (sign=-1) внесок одного бронювання — два запити.
+
+    Внесок однаковий для кожної ночі бронювання, тож достатньо одного UPDATE по діапазону днів.
+    Віднімання рядків не створює: зрізи, яких немає (локацію вже видалено каскадом), лишаються відсутніми.
+    """
+    if price is None:
+        price = Location.objects.filter(pk=location_id).values_list('price', flat=True).first()
+        if price is None:
+            return
+    days = _days(start_date, end_date)
+    if sign > 0:
+        DailyOccupancy.objects.bulk_create(
+            [DailyOccupancy(location_id=location_id, day=day) for day in days], ignore_conflicts=True
+        )
+    confirmed = sign if is_confirmed else 0
+    DailyOccupancy.objects.filter(location_id=location_id, day__range=(days[0], days[-1])).update(
+        confirmed_nights=F('confirmed_nights') + confirmed,
+        unconfirmed_nights=F('unconfirmed_nights') + (sign - confirmed),
+        revenue=F('revenue') + sign * price,
+    )
+
+
+def add_bookings(bookings):
+    prices = dict(
+        Location.objects.filter(pk__in={b.location_id for b in bookings}).values_list('pk', 'price')
+    )
+    for booking in bookings:
+        apply(booking.location_id, booking.start_date, booking.end_date, booking.is_confirmed, 1,
+              price=prices.get(booking.location_id))
+
+
+def _source_rows(model, location_ids, batch_size):
+    qs = model.objects.all()
+    if location_ids is not None:
+        qs = qs.filter(location_id__in=location_ids)
+    return (
+        qs.order_by('location_id')
+        .values_list('location_id', 'start_date', 'end_date', 'is_confirmed', 'location__price')
+        .iterator(chunk_size=batch_size)
+    )
+
+
+def rebuild(location_ids=None, batch_size=5000):
+    """Перераховує зрізи з бронювань (усіх або лише заданих локацій). Повертає кількість рядків.
+
+    Архівні бронювання (BookingArchive) теж враховуються — історія не зникає після архівації.
+    """
+    existing = DailyOccupancy.objects.all()
+    if location_ids is not None:
+        existing = existing.filter(location_id__in=location_ids)
+    rows = heapq.merge(
+        _source_rows(Booking, location_ids, batch_size),
+        _source_rows(BookingArchive, location_ids, batch_size),
+        key=lambda row: row[0],
+    )
+
+    written = 0
+    with transaction.atomic():
+        existing.delete()
+        current, days = None, {}
+
+        def flush():
+            DailyOccupancy.objects.bulk_create(
+                [
+                    DailyOccupancy(location_id=current, day=day, confirmed_nights=c, unconfirmed_nights=u,
+                                   revenue=revenue)
+                    for day, (c, u, revenue) in sorted(days.items())
+                ],
+                batch_size=batch_size,
+            )
+            return len(days)
+
+        # бронювання відсортовані за локацією — у пам'яті лише дні однієї локації
+        for location_id, start_date, end_date, is_confirmed, price in rows:
+            if location_id != current:
+                if days:
+                    written += flush()
+                current, days = location_id, {}
+            for day in _days(start_date, end_date):
+                c, u, revenue = days.get(day, (0, 0, Decimal(0)))
+                days[day] = (c + 1, u, revenue + price) if is_confirmed else (c, u + 1, revenue + price)
+        if days:
+            written += flush()
+    return written
+
+
+# Запити до зрізів: діапазон днів включно з обох боків.
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 3 * 366
+
+
+def parse_range(params):
+    """(start, end, помилка) з ?start=&end=; за замовчуванням — останні DEFAULT_DAYS днів."""
+    try:
+        end = parse_date(params['end']) if params.get('end') else datetime.date.today()
+        start = parse_date(params['start']) if params.get('start') else None
+    except ValueError:
+        end = None
+    if end is None or (params.get('start') and start is None):
+        return None, None, 'Дати у форматі РРРР-ММ-ДД.'
+    start = start or end - datetime.timedelta(days=DEFAULT_DAYS - 1)
+    if start > end or (end - start).days >= MAX_DAYS:
+        return None, None, f'Некоректний період (не більше {MAX_DAYS} днів).'
+    return start, end, None
+
+
+def _rollups(start_date, end_date, location_id=None):
+    qs = DailyOccupancy.objects.filter(day__range=(start_date, end_date))
+    if location_id is not None:
+        qs = qs.filter(location_id=location_id)
+    return qs
+
+
+def _row(confirmed, unconfirmed, revenue):
+    confirmed, unconfirmed = confirmed or 0, unconfirmed or 0
+    return {
+        'nights': confirmed + unconfirmed,
+        'confirmed_nights': confirmed,
+        'unconfirmed_nights': unconfirmed,
+        'revenue': revenue or Decimal(0),
+    }
+
+
+_SUMS = {
+    'confirmed': Sum('confirmed_nights'),
+    'unconfirmed': Sum('unconfirmed_nights'),
+    'revenue_sum': Sum('revenue'),
+}
+
+
+def totals(start_date, end_date, location_id=None):
+    """Сумарні ночі, виручка й заповненість за період."""
+    data = _rollups(start_date, end_date, location_id).aggregate(**_SUMS)
+    result = _row(data['confirmed'], data['unconfirmed'], data['revenue_sum'])
+    rooms = 1 if location_id is not None else Location.objects.filter(is_active=True).count()
+    capacity = rooms * ((end_date - start_date).days + 1)
+    result['occupancy'] = round(result['nights'] / capacity, 4) if capacity else 0.0
+    return result
+
+
+def series(start_date, end_date, location_id=None, period='day'):
+    """Ряд по днях або місяцях (period='month')."""
+    qs = _rollups(start_date, end_date, location_id)
+    bucket = TruncMonth('day') if period == 'month' else F('day')
+    rows = qs.annotate(bucket=bucket).values('bucket').annotate(**_SUMS).order_by('bucket')
+    return [
+        {'period': row['bucket'], **_row(row['confirmed'], row['unconfirmed'], row['revenue_sum'])}
+        for row in rows
+    ]
+
+
+def by_location(start_date, end_date, limit=None):
+    """Локації за виручкою за період."""
+    rows = (
+        _rollups(start_date, end_date)
+        .values('location_id', 'location__title')
+        .annotate(**_SUMS)
+        .order_by('-revenue_sum', 'location_id')
+    )
+    if limit:
+        rows = rows[:limit]
+    return [
+        {'location': row['location_id'], 'title': row['location__title'],
+         **_row(row['confirmed'], row['unconfirmed'], row['revenue_sum'])}
+        for row in rows
+    ]
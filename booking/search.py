@@ -0,0 +1,193 @@
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Повнотекстовий індекс Location (title, description) поза ORM:
+#   sqlite     — віртуальна таблиця FTS5, rowid = id локації, ранжування bm25;
+#   postgresql — таблиця з tsvector і GIN-індексом, ранжування ts_rank_cd.
+# Таблицю створює й заповнює міграція 0015, синхронізують сигнали Location, повністю
+# перебудовує команда rebuild_search_index. На інших бекендах — icontains.
+#
+# Текст нормалізується тут, а не в БД: для української немає вбудованого
+# словника ні в FTS5, ні в PostgreSQL. Апострофи всередині слова (п’ять, пам'ять)
+# прибираються, ґ зводиться до г, закінчення відкидаються легким стемером.
+# Запит — ті самі основи з пошуком за префіксом, тож працює і недописане слово.
+
+TABLE = 'booking_location_search'
+# title важить більше за опис
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+DEFAULT_LIMIT = 50
+
+_APOSTROPHES = re.compile(r"(?<=\w)['’ʼ`‘](?=\w)")
+_WORDS = re.compile(r'\w+')
+_FOLD = str.maketrans({'ґ': 'г', 'ё': 'е'})
+_CYRILLIC = re.compile(r'[а-яіїє]')
+# відмінкові закінчення іменників і прикметників та кілька дієслівних; найдовші першими
+_ENDINGS = (
+    'ами', 'ями', 'ові', 'еві', 'єві', 'ого', 'ому', 'ими', 'іми', 'ться',
+    'ий', 'ій', 'ої', 'ою', 'ею', 'єю', 'их', 'іх', 'ів', 'їв', 'ах', 'ях', 'ам', 'ям',
+    'ом', 'ем', 'єм', 'ти', 'ть', 'ся',
+    'а', 'я', 'у', 'ю', 'і', 'ї', 'е', 'є', 'о', 'и', 'ь',
+)
+# за довжиною: одна перевірка множини на довжину замість endswith по всьому списку
+_ENDINGS_BY_LENGTH = [
+    (length, frozenset(e for e in _ENDINGS if len(e) == length))
+    for length in sorted({len(e) for e in _ENDINGS}, reverse=True)
+]
+MIN_STEM = 3
+
+
+def stem(word):
+    if not _CYRILLIC.search(word):
+        return word
+    for length, endings in _ENDINGS_BY_LENGTH:
+        if len(word) - length >= MIN_STEM and word[-length:] in endings:
+            return word[:-length]
+    return word
+
+
+def words(text):
+    text = unicodedata.normalize('NFC', text or '').lower().translate(_FOLD)
+    return _WORDS.findall(_APOSTROPHES.sub('', text))
+
+
+def tokens(text):
+    return [stem(word) for word in words(text)]
+
+
+def normalize(text):
+    """Текст для індексу: кожне слово і, якщо відрізняється, його основа.
+
+    Повне слово потрібне для недописаних запитів, довших за основу (пам'ят → память).
+    """
+    terms = []
+    for word in words(text):
+        terms.append(word)
+        base = stem(word)
+        if base != word:
+            terms.append(base)
+    return ' '.join(terms)
+
+
+def backend():
+    return connection.vendor if connection.vendor in ('sqlite', 'postgresql') else None
+
+
+def _query(term):
+    # кожне слово запиту — префікс повного слова або основи; слова поєднуються через AND
+    variants = [sorted({word, stem(word)}) for word in words(term)]
+    if not variants:
+        return None
+    if backend() == 'postgresql':
+        return ' & '.join('(%s)' % ' | '.join(f'{v}:*' for v in options) for options in variants)
+    return ' AND '.join('(%s)' % ' OR '.join(f'"{v}"*' for v in options) for options in variants)
+
+
+# Синхронізація
+
+def index_locations(locations):
+    """Додає або оновлює записи індексу для локацій (потрібні pk, title, description)."""
+    rows = [(room.pk, normalize(room.title), normalize(room.description)) for room in locations]
+    if not rows or backend() is None:
+        return len(rows)
+    with connection.cursor() as cursor:
+        if backend() == 'postgresql':
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (location_id, document) VALUES '
+                "(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')) "
+                'ON CONFLICT (location_id) DO UPDATE SET document = EXCLUDED.document',
+                rows,
+            )
+        else:
+            # у FTS5 немає upsert — видаляємо й вставляємо
+            cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(pk,) for pk, _, _ in rows])
+            cursor.executemany(f'INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)', rows)
+    return len(rows)
+
+
+def remove(location_ids):
+    if backend() is None:
+        return
+    column = 'location_id' if backend() == 'postgresql' else 'rowid'
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE {column} = %s', [(pk,) for pk in location_ids])
+
+
+def rebuild(batch_size=2000):
+    """Перебудовує індекс з нуля. Повертає кількість проіндексованих локацій."""
+    from .models import Location
+
+    if backend() is None:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    total = 0
+    batch = []
+    for room in Location.objects.only('pk', 'title', 'description').order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(room)
+        if len(batch) >= batch_size:
+            total += index_locations(batch)
+            batch = []
+    return total + index_locations(batch)
+
+
+# Пошук
+
+def _matches_sql(query):
+    if backend() == 'postgresql':
+        return f"SELECT location_id FROM {TABLE} WHERE document @@ to_tsquery('simple', %s)", [query]
+    return f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [query]
+
+
+def matching_q(term):
+    """Q за всіма збігами (без ранжування) — для фільтрації довільного queryset."""
+    query = _query(term)
+    if query is None:
+        return Q(pk__in=[])
+    if backend() is None:
+        return Q(title__icontains=term.strip()) | Q(description__icontains=term.strip())
+    sql, params = _matches_sql(query)
+    return Q(pk__in=RawSQL(sql, params))
+
+
+def ranked_ids(term, limit=DEFAULT_LIMIT, active_only=True):
+    """Id локацій від найрелевантніших; title важить більше за опис."""
+    from .models import Location
+
+    query = _query(term)
+    if query is None:
+        return []
+    if backend() is None:
+        qs = Location.objects.filter(matching_q(term))
+        if active_only:
+            qs = qs.filter(is_active=True)
+        return list(qs.order_by('title', 'pk').values_list('pk', flat=True)[:limit])
+
+    active = 'AND l.is_active' if active_only else ''
+    if backend() == 'postgresql':
+        sql = (
+            f"SELECT s.location_id FROM {TABLE} s JOIN booking_location l ON l.id = s.location_id, "
+            f"to_tsquery('simple', %s) q WHERE s.document @@ q {active} "
+            f"ORDER BY ts_rank_cd('{{0.1, 0.2, 0.4, 1.0}}', s.document, q) DESC, s.location_id LIMIT %s"
+        )
+    else:
+        sql = (
+            f'SELECT s.rowid FROM {TABLE} s JOIN booking_location l ON l.id = s.rowid '
+            f'WHERE {TABLE} MATCH %s {active} '
+            f'ORDER BY bm25({TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}), s.rowid LIMIT %s'
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search(term, limit=DEFAULT_LIMIT, queryset=None, active_only=True):
+    """Локації за релевантністю: ranked_ids + один запит за об'єктами."""
+    from .models import Location
+
+    ids = ranked_ids(term, limit, active_only)
+    rooms = (queryset if queryset is not None else Location.objects.all()).in_bulk(ids)
+    return [rooms[pk] for pk in ids if pk in rooms]
@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import auth, availability, caching, images, rollups, search
+from .middleware import install_query_recorder
+from .models import Booking, BookingTombstone, Location
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    location_id = instance.location_id
+    # скидаємо і зараз, і після коміту — інакше паралельний запит може
+    # закешувати стан до завершення транзакції
+    availability.invalidate(location_id)
+    transaction.on_commit(lambda: availability.invalidate(location_id))
+
+
+# Фід змін (booking.feeds): Booking видаляється фізично, тож скасування
+# лишає tombstone. archive_bookings видаляє без сигналів — архівація не скасування.
+@receiver(post_delete, sender=Booking)
+def booking_tombstone(sender, instance, **kwargs):
+    BookingTombstone.objects.create(
+        booking_id=instance.pk,
+        location_id=instance.location_id,
+        start_date=instance.start_date,
+        end_date=instance.end_date,
+    )
+
+
+# Денні зрізи (booking.rollups): попередній стан бронювання віднімається,
+# новий — додається. Для нових бронювань pre_save не робить запиту.
+
+def _rollup_key(booking):
+    return booking.location_id, booking.start_date, booking.end_date, booking.is_confirmed
+
+
+@receiver(pre_save, sender=Booking)
+def booking_rollup_snapshot(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if not raw and not instance._state.adding:
+        instance._rollup_previous = (
+            Booking.objects.filter(pk=instance.pk)
+            .values_list('location_id', 'start_date', 'end_date', 'is_confirmed').first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+def booking_rollup_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous == _rollup_key(instance):
+        return
+    if previous is not None:
+        rollups.apply(*previous, sign=-1)
+    rollups.apply(*_rollup_key(instance), sign=1)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_rollup_deleted(sender, instance, origin=None, **kwargs):
+    # каскад від видалення локації (об'єкта чи queryset): її зрізи видаляються тим самим каскадом
+    if isinstance(origin, Location) or getattr(origin, 'model', None) is Location:
+        return
+    rollups.apply(*_rollup_key(instance), sign=-1)
+
+
+@receiver(pre_save, sender=Location)
+def location_price_snapshot(sender, instance, raw=False, **kwargs):
+    instance._rollup_price = None
+    if not raw and not instance._state.adding:
+        instance._rollup_price = Location.objects.filter(pk=instance.pk).values_list('price', flat=True).first()
+
+
+@receiver(post_save, sender=Location)
+def location_price_changed(sender, instance, **kwargs):
+    # виручка зрізів рахується за поточною ціною — при її зміні перераховуємо локацію
+    previous = getattr(instance, '_rollup_price', None)
+    if previous is not None and previous != instance.price:
+        location_id = instance.pk
+        transaction.on_commit(lambda: rollups.rebuild([location_id]))
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def location_changed(sender, instance, **kwargs):
+    caching.invalidate_locations()
+    transaction.on_commit(caching.invalidate_locations)
+
+
+# Повнотекстовий індекс (booking.search) оновлюється в тій самій транзакції.
+@receiver(post_save, sender=Location)
+def location_search_saved(sender, instance, **kwargs):
+    search.index_locations([instance])
+
+
+@receiver(post_delete, sender=Location)
+def location_search_deleted(sender, instance, **kwargs):
+    search.remove([instance.pk])
+
+
+@receiver(post_save, sender=Location)
+def location_image_saved(sender, instance, **kwargs):
+    # похідні генеруються після коміту і поза потоком запиту
+    if instance.image and not images.is_current(instance.image, instance.image_derivatives):
+        location_id = instance.pk
+        transaction.on_commit(lambda: images.schedule(location_id))
+
+
+@receiver(connection_created)
+def record_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+# Кеш користувачів (booking.auth): зміна пароля, активація в activate чи правки
+# в адмінці мають одразу діяти на вже відкриті сесії.
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    user_id = instance.pk
+    auth.invalidate(user_id)
+    transaction.on_commit(lambda: auth.invalidate(user_id))
@@ -0,0 +1,18 @@
+'use strict';
+// Фільтр списку адмінки з автодоповненням (booking.admin.RelatedAutocompleteFilter):
+// вибір значення перезавантажує список з відповідним параметром запиту.
+{
+    const $ = django.jQuery;
+    $(function() {
+        $('select[data-filter-param]').on('change', function() {
+            const params = new URLSearchParams(window.location.search);
+            params.delete('p');
+            if (this.value) {
+                params.set(this.dataset.filterParam, this.value);
+            } else {
+                params.delete(this.dataset.filterParam);
+            }
+            window.location.search = params.toString();
+        });
+    });
+}
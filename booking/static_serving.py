@@ -0,0 +1,112 @@
+import mimetypes
+import os
+import re
+from urllib.parse import unquote
+
+from django.utils.http import http_date, parse_http_date_safe
+
+# Хешоване ім'я від ManifestStaticFilesStorage: name.0123456789ab.ext
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+CHUNK_SIZE = 64 * 1024
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class AssetServer:
+    """WSGI-шар перед Django для статики й медіа без окремого веб-сервера.
+
+    Статика з хешованими іменами — з вічним Cache-Control і попередньо
+    стиснутими .br/.gz варіантами. Медіа — з ETag/Last-Modified і 304 на
+    умовні GET; похідні зображення (шлях з хешем вмісту) — також immutable.
+    """
+
+    def __init__(self, application, static_url, static_root, media_url, media_root,
+                 media_max_age=3600, immutable_media_prefixes=('room_images/derived/',)):
+        self.application = application
+        self.mounts = [
+            (self._prefix(static_url), os.path.realpath(static_root), True),
+            (self._prefix(media_url), os.path.realpath(media_root), False),
+        ]
+        self.media_max_age = media_max_age
+        self.immutable_media_prefixes = immutable_media_prefixes
+
+    @staticmethod
+    def _prefix(url):
+        return '/' + url.strip('/') + '/'
+
+    def __call__(self, environ, start_response):
+        method = environ.get('REQUEST_METHOD')
+        path = environ.get('PATH_INFO', '')
+        if method in ('GET', 'HEAD'):
+            for prefix, root, is_static in self.mounts:
+                if path.startswith(prefix):
+                    relative = unquote(path[len(prefix):])
+                    filename = self._resolve(root, relative)
+                    if filename is not None:
+                        return self._serve(environ, start_response, filename, relative, is_static)
+        return self.application(environ, start_response)
+
+    @staticmethod
+    def _resolve(root, relative):
+        filename = os.path.realpath(os.path.join(root, relative))
+        # захист від ../ та симлінків за межі кореня
+        if not filename.startswith(root + os.sep) or not os.path.isfile(filename):
+            return None
+        return filename
+
+    def _cache_control(self, relative, is_static):
+        if is_static:
+            return IMMUTABLE if HASHED_NAME.search(relative) else 'public, max-age=60'
+        if relative.startswith(self.immutable_media_prefixes):
+            return IMMUTABLE
+        return f'public, max-age={self.media_max_age}'
+
+    def _serve(self, environ, start_response, filename, relative, is_static):
+        content_type, _ = mimetypes.guess_type(filename)
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Cache-Control', self._cache_control(relative, is_static)),
+        ]
+        encoding = None
+        if is_static:
+            headers.append(('Vary', 'Accept-Encoding'))
+            accepted = environ.get('HTTP_ACCEPT_ENCODING', '')
+            for name, suffix in ENCODINGS:
+                if name in accepted and os.path.isfile(filename + suffix):
+                    filename, encoding = filename + suffix, name
+                    break
+
+        stat = os.stat(filename)
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}{"-" + encoding if encoding else ""}"'
+        headers += [('ETag', etag), ('Last-Modified', http_date(stat.st_mtime))]
+
+        if self._not_modified(environ, etag, stat.st_mtime):
+            start_response('304 Not Modified', headers)
+            return []
+
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        headers.append(('Content-Length', str(stat.st_size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        fh = open(filename, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(fh, CHUNK_SIZE)
+        return _iter_file(fh)
+
+    @staticmethod
+    def _not_modified(environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+        since = parse_http_date_safe(environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return since is not None and int(mtime) <= since
+
+
+def _iter_file(fh):
+    with fh:
+        while chunk := fh.read(CHUNK_SIZE):
+            yield chunk
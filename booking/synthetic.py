@@ -0,0 +1,80 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from .models import Booking, Location
+
+# Типові тривалості проживання (ночі) і їх ваги.
+STAY_LENGTHS = [1, 2, 3, 4, 5, 7, 10, 14]
+STAY_WEIGHTS = [10, 20, 22, 14, 10, 14, 6, 4]
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate(locations=100, users=50, bookings=1000, seed=0, start=None, batch_size=5000):
+    """Наповнює БД синтетичними даними через bulk_create (без Booking.clean).
+
+    Бронювання однієї локації не перетинаються і йдуть одне за одним
+    від start з випадковими проміжками. Повертає (locations, users, bookings).
+    """
+    rng = random.Random(seed)
+    start = start or datetime.date.today() - datetime.timedelta(days=365)
+
+    first_location = Location.objects.count()
+    for chunk in _chunks((
+        Location(
+            number=str(first_location + i),
+            title=f'Synthetic room {seed}-{first_location + i}',
+            capacity=rng.randint(1, 6),
+            price=Decimal(rng.randrange(300, 3000)),
+            description='Синтетична кімната для навантажувальних тестів.',
+            is_active=rng.random() > 0.05,
+        )
+        for i in range(locations)
+    ), batch_size):
+        Location.objects.bulk_create(chunk)
+    location_ids = list(
+        Location.objects.order_by('-pk').values_list('pk', flat=True)[:locations]
+    )
+
+    first_user = User.objects.count()
+    for chunk in _chunks((
+        User(username=f'synthetic-{seed}-{first_user + i}', email=f'user{first_user + i}@example.com',
+             password='!')
+        for i in range(users)
+    ), batch_size):
+        User.objects.bulk_create(chunk)
+    user_ids = list(User.objects.order_by('-pk').values_list('pk', flat=True)[:users])
+
+    cursors = {pk: start for pk in location_ids}
+
+    def rows():
+        for _ in range(bookings):
+            location_id = rng.choice(location_ids)
+            check_in = cursors[location_id] + datetime.timedelta(days=rng.randrange(0, 6))
+            check_out = check_in + datetime.timedelta(
+                days=rng.choices(STAY_LENGTHS, STAY_WEIGHTS)[0]
+            )
+            cursors[location_id] = check_out + datetime.timedelta(days=1)
+            yield Booking(
+                user_id=rng.choice(user_ids),
+                location_id=location_id,
+                start_date=check_in,
+                end_date=check_out,
+                is_confirmed=rng.random() > 0.3,
+            )
+
+    for chunk in _chunks(rows(), batch_size):
+        Booking.objects.bulk_create(chunk)
+    return location_ids, user_ids, bookings
@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+register = template.Library()
+
+FLATPICKR_VERSION = '4.6.13'
+FLATPICKR_CDN = f'https://cdn.jsdelivr.net/npm/flatpickr@{FLATPICKR_VERSION}/dist/'
+VENDOR_DIR = 'vendor/flatpickr/'
+
+
+@lru_cache(maxsize=None)
+def _vendored(filename):
+    # manage.py vendor_assets кладе файли в booking/static/vendor/flatpickr/
+    return finders.find(VENDOR_DIR + filename) is not None
+
+
+def _asset_url(filename):
+    if _vendored(filename):
+        return static(VENDOR_DIR + filename)
+    return FLATPICKR_CDN + filename
+
+
+@register.simple_tag
+def flatpickr_css():
+    return format_html('<link rel="stylesheet" href="{}">', _asset_url('flatpickr.min.css'))
+
+
+@register.simple_tag
+def flatpickr_js():
+    return format_html('<script src="{}"></script>', _asset_url('flatpickr.min.js'))
@@ -0,0 +1,25 @@
+from django import template
+from django.utils.html import format_html
+
+from booking import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(location, sizes='(min-width: 768px) 448px, 100vw', css_class=''):
+    if not location.image:
+        return ''
+    derivatives = location.image_derivatives
+    if not images.is_current(location.image, derivatives):
+        # похідні ще генеруються — віддаємо оригінал
+        return format_html('<img src="{}" alt="{}" class="{}">', location.image.url, location.title, css_class)
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="lazy" decoding="async">'
+        '</picture>',
+        images.srcset(derivatives, 'webp'), sizes,
+        images.derivative_url(derivatives, derivatives['widths'][-1], 'jpg'), images.srcset(derivatives, 'jpg'), sizes,
+        location.title, css_class,
+    )
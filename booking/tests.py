@@ -1,3 +1,1278 @@
-from django.test import TestCase
+import datetime
+import io
+import os
+import json
+import random
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from PIL import Image
+
+from . import (
+    async_views, availability, benchmarks, caching, checks, feeds, images, metrics, outbox, ratelimit, rollups,
+    search, views,
+)
+from .availability import IntervalIndex
+from .models import Booking, BookingArchive, BookingTombstone, DailyOccupancy, Location, OutboundEmail
+from .pagination import EstimatedCountPaginator
+
+
+def d(day):
+    return datetime.date(2030, 1, 1) + datetime.timedelta(days=day)
+
+
+class IntervalIndexTests(TestCase):
+    def setUp(self):
+        self.index = IntervalIndex([(d(10), d(12)), (d(0), d(3)), (d(20), d(30))])
+
+    def test_is_free(self):
+        self.assertFalse(self.index.is_free(d(3), d(5)))
+        self.assertFalse(self.index.is_free(d(11), d(11)))
+        self.assertFalse(self.index.is_free(d(-5), d(40)))
+        self.assertTrue(self.index.is_free(d(4), d(9)))
+        self.assertTrue(self.index.is_free(d(31), d(40)))
+
+    def test_add_rejects_overlap(self):
+        self.assertFalse(self.index.add(d(12), d(14)))
+        self.assertTrue(self.index.add(d(13), d(19)))
+        self.assertEqual(len(self.index), 4)
+
+    def test_next_free_window(self):
+        self.assertEqual(self.index.next_free_window(2, d(0)), d(4))
+        # 6 вільних днів між d(4) та d(9) — замало для 6 ночей
+        self.assertEqual(self.index.next_free_window(6, d(0)), d(13))
+        self.assertEqual(self.index.next_free_window(7, d(0)), d(31))
+        self.assertEqual(self.index.next_free_window(1, d(14)), d(14))
+        self.assertEqual(IntervalIndex().next_free_window(3, d(5)), d(5))
+
+
+class BusyRangesTests(TestCase):
+    def test_merge_ranges_joins_touching_intervals(self):
+        rows = [(d(0), d(2)), (d(3), d(5)), (d(4), d(4)), (d(8), d(9))]
+        self.assertEqual(availability.merge_ranges(rows), [[d(0), d(5)], [d(8), d(9)]])
+
+    def test_location_detail_payload(self):
+        cache.clear()
+        user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+        Booking.objects.create(user=user, location=room, start_date=d(0), end_date=d(2))
+        Booking.objects.create(user=user, location=room, start_date=d(3), end_date=d(30))
+        response = self.client.get(f'/rooms/{room.pk}/')
+        self.assertEqual(
+            json.loads(response.context['busy_ranges_json']),
+            [[d(0).isoformat(), d(30).isoformat()]],
+        )
+
+class BookingOverlapTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(3))
+
+    def test_model_rejects_overlap(self):
+        with self.assertRaises(ValidationError):
+            Booking.objects.create(user=self.user, location=self.room, start_date=d(3), end_date=d(5))
+
+    def test_next_free_window_tracks_saves(self):
+        self.assertEqual(availability.next_free_window(self.room.pk, 2, d(0)), d(4))
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(4), end_date=d(6))
+        self.assertEqual(availability.next_free_window(self.room.pk, 2, d(0)), d(7))
+
+    def test_next_free_window_follows_shared_version_and_clamps_past(self):
+        self.assertEqual(availability.next_free_window(self.room.pk, 2, d(0)), d(4))
+        # запис з іншого воркера: рядок у БД і версія в спільному кеші, локальний індекс не чіпали
+        Booking.objects.bulk_create([Booking(user=self.user, location=self.room, start_date=d(4), end_date=d(6))])
+        caching.bump_version(f'availability-index:{self.room.pk}')
+        self.assertEqual(availability.next_free_window(self.room.pk, 2, d(0)), d(7))
+        today = datetime.date.today()
+        self.assertEqual(availability.next_free_window(self.room.pk, 2, today - datetime.timedelta(days=30)), today)
+
+    def test_view_single_overlap_query(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                f'/booking/{self.room.pk}/create/',
+                {'start_time': d(2).isoformat(), 'end_time': d(4).isoformat()},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Booking.objects.count(), 1)
+        overlap_queries = [q for q in ctx.captured_queries if '"start_date" <=' in q['sql']]
+        self.assertEqual(len(overlap_queries), 1)
+
+
+class ConcurrentReserveTests(TransactionTestCase):
+    THREADS = 8
+    ATTEMPTS = 10
+
+    def setUp(self):
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.rooms = [
+            Location.objects.create(title=f'Room {i}', capacity=2, price=100, description='')
+            for i in range(3)
+        ]
+
+    def _worker(self, seed, barrier, errors):
+        rng = random.Random(seed)
+        barrier.wait()
+        try:
+            for _ in range(self.ATTEMPTS):
+                room = rng.choice(self.rooms)
+                start = rng.randrange(0, 30)
+                try:
+                    availability.reserve(self.user, room.pk, d(start), d(start + rng.randrange(0, 4)))
+                except ValidationError:
+                    pass
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_no_overlaps_under_contention(self):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+        threads = [
+            threading.Thread(target=self._worker, args=(seed, barrier, errors))
+            for seed in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(Booking.objects.exists())
+        for room in self.rooms:
+            rows = list(room.bookings.order_by('start_date').values_list('start_date', 'end_date'))
+            for (_, prev_end), (next_start, _) in zip(rows, rows[1:]):
+                self.assertLess(prev_end, next_start)
+
+
+class CalendarCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+        self.booking = Booking.objects.create(
+            user=self.user, location=self.room, start_date=d(0), end_date=d(2)
+        )
+
+    def _booking_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        return response, [q for q in ctx.captured_queries if 'booking_booking' in q['sql']]
+
+    def test_hot_path_skips_booking_table(self):
+        url = f'/rooms/{self.room.pk}/availability/'
+        self.client.get(url)
+        before = availability.cache_stats()
+        response, queries = self._booking_queries(url)
+        self.assertEqual(queries, [])
+        self.assertEqual(response.json()['busy'], [[d(0).isoformat(), d(2).isoformat()]])
+        self.assertEqual(availability.cache_stats()['hits'], before['hits'] + 1)
+
+    def test_cancel_invalidates(self):
+        url = f'/rooms/{self.room.pk}/availability/'
+        self.client.get(url)
+        self.client.force_login(self.user)
+        self.client.post(f'/booking/{self.booking.pk}/cancel/')
+        response, queries = self._booking_queries(url)
+        # календар і стан для ETag перераховуються по одному разу
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(response.json()['busy'], [])
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, messages):
+        raise OSError('SMTP недоступний')
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+
+    def test_booking_create_enqueues_instead_of_sending(self):
+        self.client.force_login(self.user)
+        self.client.post(
+            f'/booking/{self.room.pk}/create/',
+            {'start_time': d(0).isoformat(), 'end_time': d(2).isoformat()},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.PENDING).count(), 1)
+
+        call_command('send_outbox', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['guest@example.com'])
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.SENT)
+
+    @override_settings(EMAIL_BACKEND='booking.tests.FailingBackend')
+    def test_failed_send_backs_off_then_gives_up(self):
+        outbox.enqueue('Тема', 'activation_email.html', {'user': self.user}, to=['a@example.com'])
+        self.assertEqual(outbox.send_batch(max_attempts=2, backoff_seconds=60), (0, 1))
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.PENDING)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        # ще не час для повтору
+        self.assertEqual(outbox.send_batch(), (0, 0))
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        outbox.send_batch(max_attempts=2)
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.FAILED)
+
+
+    def test_expired_lease_is_not_overwritten(self):
+        outbox.enqueue('Тема', 'activation_email.html', {'user': self.user}, to=['a@example.com'])
+        [mine] = outbox.claim_batch(10)
+        # відправка затяглась довше за lease — лист забрав інший воркер
+        OutboundEmail.objects.update(claimed_until=timezone.now() - datetime.timedelta(seconds=1))
+        [theirs] = outbox.claim_batch(10)
+        self.assertFalse(outbox._renew(mine, 60))
+        self.assertFalse(outbox._mark_sent(mine))
+        self.assertFalse(outbox._mark_failed(mine, RuntimeError(), 5, 30))
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts, email.claimed_by), (OutboundEmail.PENDING, 0, theirs.claimed_by))
+        self.assertTrue(outbox._mark_sent(theirs))
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.SENT)
+
+class RoomSearchTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.free = Location.objects.create(title='Free', capacity=4, price=500, description='')
+        self.busy = Location.objects.create(title='Busy', capacity=4, price=400, description='')
+        Location.objects.create(title='Small', capacity=1, price=100, description='')
+        Location.objects.create(title='Closed', capacity=4, price=100, description='', is_active=False)
+        Booking.objects.create(user=user, location=self.busy, start_date=d(5), end_date=d(9))
+
+    def search(self, **params):
+        params.setdefault('format', 'json')
+        return self.client.get('/rooms/search/', params)
+
+    def test_single_query_filters_busy_small_and_inactive(self):
+        with self.assertNumQueries(2):  # COUNT для пагінації + сторінка
+            response = self.search(check_in=d(8).isoformat(), check_out=d(10).isoformat(), guests=2)
+        self.assertEqual([r['id'] for r in response.json()['results']], [self.free.pk])
+
+    def test_sort_and_price_filter(self):
+        response = self.search(
+            check_in=d(10).isoformat(), check_out=d(12).isoformat(), guests=2, sort='-price'
+        )
+        self.assertEqual([r['id'] for r in response.json()['results']], [self.free.pk, self.busy.pk])
+        response = self.search(
+            check_in=d(10).isoformat(), check_out=d(12).isoformat(), guests=2, max_price=450
+        )
+        self.assertEqual([r['id'] for r in response.json()['results']], [self.busy.pk])
+
+    def test_invalid_range(self):
+        response = self.search(check_in=d(3).isoformat(), check_out=d(1).isoformat())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/rooms/search/', {'check_in': 'x'}).status_code, 200)
+
+
+class RoomListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _create(self, count):
+        first = Location.objects.count()
+        Location.objects.bulk_create(
+            Location(title=f'Room {i:04}', capacity=2, price=100, description='x' * 1000)
+            for i in range(first, first + count)
+        )
+
+    def _location_queries(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/rooms/', params or {})
+        return response, [q for q in ctx.captured_queries if 'booking_location' in q['sql']]
+
+    def test_constant_queries_and_bounded_page(self):
+        self._create(5)
+        _, small = self._location_queries()
+        cache.clear()
+        self._create(100)
+        response, large = self._location_queries()
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(large), 1)
+        rooms = response.context['rooms_list'].object_list
+        self.assertEqual(len(rooms), views.ROOM_LIST_PAGE_SIZE)
+        loaded = {f.attname for f in Location._meta.concrete_fields} - rooms[0].get_deferred_fields()
+        self.assertEqual(loaded, {'id', 'number', 'title', 'capacity', 'price', 'updated_at'})
+        self.assertNotIn('description', large[0]['sql'])
+
+    def test_cursor_walks_all_rooms_and_cache_follows_edits(self):
+        self._create(30)
+        seen = []
+        params = {}
+        while True:
+            response = self.client.get('/rooms/', params)
+            page = response.context['rooms_list']
+            seen.extend(room.title for room in page)
+            if not page.has_next:
+                break
+            params = {'after': page.next_cursor}
+        self.assertEqual(seen, sorted(Location.objects.values_list('title', flat=True)))
+
+        _, queries = self._location_queries()
+        self.assertEqual(queries, [])
+        Location.objects.create(title='Room 0000a', capacity=2, price=100, description='')
+        response, queries = self._location_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'Room 0000a')
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name, IMAGE_DERIVATIVES_BACKGROUND=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _png(self, size):
+        buffer = io.BytesIO()
+        Image.new('RGBA', size, (200, 50, 50, 255)).save(buffer, 'PNG')
+        return SimpleUploadedFile('room.png', buffer.getvalue(), content_type='image/png')
+
+    def test_upload_generates_hashed_derivatives(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            room = Location.objects.create(
+                title='Room', capacity=2, price=100, description='', image=self._png((800, 400))
+            )
+        room.refresh_from_db()
+        derivatives = room.image_derivatives
+        self.assertEqual(derivatives['source'], room.image.name)
+        self.assertEqual(derivatives['widths'], [320, 640, 800])
+        for width in derivatives['widths']:
+            for ext in ('webp', 'jpg'):
+                self.assertTrue(default_storage.exists(images.derivative_name(derivatives['hash'], width, ext)))
+
+        cache.clear()
+        response = self.client.get(f'/rooms/{room.pk}/')
+        self.assertContains(response, f"derived/{derivatives['hash']}/640.webp 640w")
+
+
+class ProfileTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+        self.client.force_login(self.user)
+        # прогрів сесії й кешу користувачів (booking.auth)
+        self.client.get('/profile/')
+
+    def _past(self, count):
+        start = datetime.date.today() - datetime.timedelta(days=3 * count + 10)
+        Booking.objects.bulk_create(
+            Booking(user=self.user, location=self.room,
+                    start_date=start + datetime.timedelta(days=3 * i),
+                    end_date=start + datetime.timedelta(days=3 * i + 1))
+            for i in range(count)
+        )
+
+    def _queries(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/profile/', params)
+        return response, len(ctx.captured_queries)
+
+    def test_constant_queries(self):
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(1))
+        self._past(1)
+        _, few = self._queries()
+        self._past(10_000)
+        response, many = self._queries()
+        # з малою історією сторінка доходить до архіву — на один запит більше, не на рядок
+        self.assertLessEqual(many, few)
+        self.assertLessEqual(few, many + 1)
+        self.assertEqual(len(response.context['active_bookings']), 1)
+        self.assertEqual(len(response.context['past_bookings']), views.PROFILE_PAST_PAGE_SIZE)
+
+    def test_past_pagination(self):
+        self._past(25)
+        response, _ = self._queries(past_page=2)
+        past = response.context['past_bookings']
+        self.assertEqual(len(past), 5)
+        self.assertEqual(past[-1], Booking.objects.order_by('end_date').first())
+        self.assertTrue(response.context['past_has_previous'])
+        self.assertFalse(response.context['past_has_next'])
+        self.assertTrue(self._queries(past_page=1)[0].context['past_has_next'])
+
+    def test_str_does_not_query(self):
+        booking = Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(1))
+        booking = Booking.objects.get(pk=booking.pk)
+        with self.assertNumQueries(0):
+            str(booking)
+
+
+class BulkImportExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(3))
+
+    def _import(self, content, suffix):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, encoding='utf-8') as fh:
+            fh.write(content)
+        self.addCleanup(os.unlink, fh.name)
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_bookings', fh.name, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import_checks_overlaps_in_memory(self):
+        content = (
+            'user,location,start_date,end_date,is_confirmed\n'
+            f'guest,{self.room.pk},{d(4)},{d(6)},true\n'
+            f'guest,{self.room.pk},{d(6)},{d(8)},false\n'  # перетин із попереднім рядком файлу
+            f'guest,{self.room.pk},{d(2)},{d(2)},false\n'  # перетин з наявним бронюванням
+            f'nobody,{self.room.pk},{d(20)},{d(21)},false\n'
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            out, err = self._import(content, '.csv')
+        self.assertIn('imported=1 rejected=3', out)
+        self.assertIn('рядок 2: дати вже зайняті', err)
+        self.assertTrue(Booking.objects.get(start_date=d(4)).is_confirmed)
+        # + 4 запити на перебудову денних зрізів з бронювань і архіву (незалежно від кількості рядків)
+        self.assertLessEqual(len(ctx.captured_queries), 12)
+        self.assertEqual(rollups.totals(d(4), d(6), self.room.pk)['confirmed_nights'], 2)
+
+    def test_export_jsonl_round_trip(self):
+        out = io.StringIO()
+        call_command('export_bookings', '--format', 'jsonl', stdout=out, stderr=io.StringIO())
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(rows[0]['user'], 'guest')
+        self.assertEqual(rows[0]['start_date'], d(0).isoformat())
+
+        Booking.objects.all().delete()
+        result, _ = self._import(out.getvalue(), '.jsonl')
+        self.assertIn('imported=1 rejected=0', result)
+        self.assertEqual(Booking.objects.get().end_date, d(3))
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_pragmas_applied(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('лише для SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS.get('busy_timeout', 0))
+
+
+class BenchmarkCompareTests(TestCase):
+    def _results(self, p95, queries):
+        return {'scenarios': {'client:room_list': {'p95_ms': p95, 'queries': queries, 'errors': 0}}}
+
+    def test_regressions(self):
+        baseline = self._results(10.0, 2)
+        self.assertEqual(benchmarks.compare(self._results(12.0, 2), baseline, 0.25), [])
+        self.assertEqual(len(benchmarks.compare(self._results(13.0, 3), baseline, 0.25)), 2)
+        # шум на швидких сценаріях не вважається регресією
+        self.assertEqual(benchmarks.compare(self._results(0.9, 2), self._results(0.5, 2), 0.25), [])
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+
+    def test_metrics_record_per_view(self):
+        before = metrics.DB_QUERIES.snapshot('location_detail')
+        self.client.get(f'/rooms/{self.room.pk}/')
+        after = metrics.DB_QUERIES.snapshot('location_detail')
+        self.assertEqual(after[2], (before[2] if before else 0) + 1)
+        self.assertGreater(metrics.TEMPLATE_SECONDS.snapshot('location_detail')[1], 0)
+
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('booking_request_duration_seconds_count{view="location_detail"}', body)
+        self.assertIn('booking_db_queries_bucket{view="location_detail",le="+Inf"}', body)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.1').status_code, 403)
+
+    def test_slow_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'slow.json')
+            with override_settings(PERF_SLOW_LOG=path, PERF_SLOW_LOG_SIZE=2):
+                for _ in range(3):
+                    self.client.get(f'/rooms/{self.room.pk}/')
+            with open(path, encoding='utf-8') as fh:
+                entries = json.load(fh)
+        self.assertEqual(len(entries), 2)
+        self.assertGreaterEqual(entries[0]['ms'], entries[1]['ms'])
+        self.assertTrue(any('booking_location' in sql for _, sql in entries[0]['sql']))
+
+
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(2))
+
+    async def test_asgi_serves_async_views(self):
+        response = await self.async_client.get('/rooms/')
+        self.assertIs(response.resolver_match.func, async_views.room_list)
+        self.assertContains(response, 'Room')
+
+        response = await self.async_client.get(f'/rooms/{self.room.pk}/')
+        self.assertIs(response.resolver_match.func, async_views.location_detail)
+        self.assertEqual(json.loads(response.context['busy_ranges_json']), [[d(0).isoformat(), d(2).isoformat()]])
+
+        response = await self.async_client.get(f'/rooms/{self.room.pk}/availability/')
+        self.assertEqual(response.json()['busy'], [[d(0).isoformat(), d(2).isoformat()]])
+
+        # решта маршрутів — ті самі sync-view
+        response = await self.async_client.get('/rooms/search/')
+        self.assertIs(response.resolver_match.func, views.room_search)
+
+    async def test_authenticated_header(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/rooms/')
+        self.assertContains(response, 'guest')
+
+    @override_settings(ASYNC_VIEWS=False)
+    async def test_toggle(self):
+        response = await self.async_client.get('/rooms/')
+        self.assertIs(response.resolver_match.func, views.room_list)
+
+
+class AssetPipelineTests(TestCase):
+    def _call(self, app, path, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path}
+        environ.update(headers)
+        status = []
+        response_headers = {}
+
+        def start_response(s, hdrs, exc_info=None):
+            status.append(int(s.split()[0]))
+            response_headers.update(hdrs)
+
+        body = b''.join(app(environ, start_response))
+        return status[0], response_headers, body
+
+    def test_collectstatic_writes_compressed_hashed_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(STATIC_ROOT=root, STORAGES={
+                **settings.STORAGES,
+                'staticfiles': {'BACKEND': 'booking.storage.CompressedManifestStaticFilesStorage'},
+            }):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                from django.contrib.staticfiles.storage import staticfiles_storage
+                name = staticfiles_storage.stored_name('booking/css/location_detail.css')
+            self.assertRegex(name, r'location_detail\.[0-9a-f]{12}\.css$')
+            self.assertTrue(os.path.exists(os.path.join(root, name + '.gz')))
+
+            from .static_serving import AssetServer
+            app = AssetServer(lambda e, s: [], '/static/', root, '/media/', root)
+            status, headers, body = self._call(app, '/static/' + name, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(status, 200)
+            self.assertEqual(headers['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', headers['Cache-Control'])
+            self.assertEqual(headers['Vary'], 'Accept-Encoding')
+
+    def test_media_conditional_get(self):
+        from .static_serving import AssetServer
+
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, 'room_images', 'derived'))
+            with open(os.path.join(root, 'room_images', 'derived', 'a-640.webp'), 'wb') as fh:
+                fh.write(b'x' * 100)
+            fallback = []
+            app = AssetServer(lambda e, s: fallback.append(e['PATH_INFO']) or [], '/static/', root, '/media/', root)
+
+            status, headers, body = self._call(app, '/media/room_images/derived/a-640.webp')
+            self.assertEqual((status, len(body)), (200, 100))
+            self.assertIn('immutable', headers['Cache-Control'])
+
+            status, _, body = self._call(
+                app, '/media/room_images/derived/a-640.webp', HTTP_IF_NONE_MATCH=headers['ETag'])
+            self.assertEqual((status, body), (304, b''))
+            status, _, _ = self._call(
+                app, '/media/room_images/derived/a-640.webp', HTTP_IF_MODIFIED_SINCE=headers['Last-Modified'])
+            self.assertEqual(status, 304)
+
+            # вихід за межі кореня і відсутні файли віддаються далі Django
+            for path in ('/media/../etc/passwd', '/media/missing.jpg'):
+                app({'REQUEST_METHOD': 'GET', 'PATH_INFO': path}, None)
+            self.assertEqual(fallback, ['/media/../etc/passwd', '/media/missing.jpg'])
+
+
+class LocationCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+
+    def test_read_through_and_invalidation(self):
+        self.assertEqual(caching.get_location(self.room.pk), self.room)
+        with self.assertNumQueries(0):
+            self.assertEqual(caching.get_location(self.room.pk).title, 'Room')
+        self.assertEqual(caching.active_locations(), [self.room])
+        with self.assertNumQueries(0):
+            self.assertEqual(caching.active_locations(), [self.room])
+        self.assertIsNone(caching.get_location(self.room.pk + 1000))
+
+        self.room.title = 'Renamed'
+        self.room.save()
+        self.assertEqual(caching.get_location(self.room.pk).title, 'Renamed')
+        Location.objects.filter(pk=self.room.pk).update(is_active=False)
+        caching.invalidate_locations()
+        self.assertEqual(caching.active_locations(), [])
+
+    def test_admin_save_invalidates(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(admin_user)
+        caching.get_location(self.room.pk)
+        version = caching.get_version(caching.LOCATIONS)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/admin/booking/location/{self.room.pk}/change/', {
+                'title': 'Edited', 'number': self.room.number, 'capacity': 2, 'price': 100,
+                'description': 'Опис', 'is_active': 'on',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertGreater(caching.get_version(caching.LOCATIONS), version)
+        self.assertEqual(caching.get_location(self.room.pk).title, 'Edited')
+
+    def test_conditional_get(self):
+        url = f'/rooms/{self.room.pk}/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertTemplateNotUsed('location_detail.html'):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # нове бронювання, скасування й вхід користувача змінюють ETag
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(2))
+        booking = Booking.objects.create(user=self.user, location=self.room, start_date=d(5), end_date=d(6))
+        after_booking = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after_booking.status_code, 200)
+        booking.delete()
+        self.assertNotIn(self.client.get(url)['ETag'], (etag, after_booking['ETag']))
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        response = self.client.get(f'/rooms/{self.room.pk}/availability/')
+        self.assertEqual(
+            self.client.get(f'/rooms/{self.room.pk}/availability/', HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            304,
+        )
+        response = self.client.get('/rooms/')
+        self.assertEqual(self.client.get('/rooms/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    async def test_async_conditional_get(self):
+        url = f'/rooms/{self.room.pk}/'
+        response = await self.async_client.get(url)
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        response = await self.async_client.get('/rooms/0/')
+        self.assertEqual(response.status_code, 404)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sliding_window(self):
+        ident = ['ip:1.2.3.4']
+        for _ in range(3):
+            ratelimit.hit('t', ident, 3, 60, now=600)
+        with self.assertRaises(ratelimit.RateLimited) as ctx:
+            ratelimit.hit('t', ident, 3, 60, now=630)
+        self.assertEqual(ctx.exception.retry_after, 30)
+        # наступне вікно: 1 + 4 * 55/60 > 3; місце буде, коли вага попереднього впаде до 1/2
+        with self.assertRaises(ratelimit.RateLimited) as ctx:
+            ratelimit.hit('t', ident, 3, 60, now=665)
+        self.assertEqual(ctx.exception.retry_after, 25)
+        ratelimit.hit('t', ident, 3, 60, now=715)
+
+    def test_client_ip_trusts_forwarded_only_from_proxies(self):
+        factory = RequestFactory()
+        direct = factory.get('/', HTTP_X_FORWARDED_FOR='6.6.6.6', REMOTE_ADDR='9.9.9.9')
+        proxied = factory.get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4, 10.0.0.7', REMOTE_ADDR='10.0.0.5')
+        self.assertEqual(ratelimit.client_ip(direct), '9.9.9.9')
+        self.assertEqual(ratelimit.client_ip(proxied), '10.0.0.5')
+        with override_settings(RATE_LIMIT_TRUSTED_PROXIES=['10.0.0.0/8']):
+            # підроблену ліву частину заголовка клієнт контролює — береться перша недовірена справа
+            self.assertEqual(ratelimit.client_ip(proxied), '1.2.3.4')
+            self.assertEqual(ratelimit.client_ip(direct), '9.9.9.9')
+
+    @override_settings(RATE_LIMITS={'register': {'rate': '2/h', 'methods': ['POST']}})
+    def test_register_throttled_by_ip(self):
+        for i in range(2):
+            self.client.post('/register/', {'username': f'u{i}'})
+        self.assertEqual(self.client.get('/register/').status_code, 200)
+        response = self.client.post('/register/', {'username': 'u3'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # інша адреса має власний бюджет
+        self.assertNotEqual(self.client.post('/register/', {}, REMOTE_ADDR='10.0.0.9').status_code, 429)
+
+    @override_settings(RATE_LIMITS={'booking_create': {'rate': '1/m', 'methods': ['POST']}})
+    def test_booking_create_throttled_by_user(self):
+        user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+        self.client.force_login(user)
+        url = f'/booking/{room.pk}/create/'
+        self.client.post(url, {'start_time': d(0).isoformat(), 'end_time': d(1).isoformat()})
+        # зміна IP не обходить бюджет користувача
+        response = self.client.post(url, {'start_time': d(5).isoformat(), 'end_time': d(6).isoformat()},
+                                    REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    @override_settings(RATE_LIMITS={'login': {'rate': '1/m', 'methods': ['POST']}})
+    def test_middleware_limits_named_routes(self):
+        self.client.post('/accounts/login/', {'username': 'x', 'password': 'y'})
+        self.assertEqual(self.client.post('/accounts/login/', {'username': 'x', 'password': 'y'}).status_code, 429)
+
+
+class BatchBookingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.rooms = [
+            Location.objects.create(title=f'Room {i}', capacity=2, price=100, description='') for i in range(3)
+        ]
+        Booking.objects.create(user=self.user, location=self.rooms[1], start_date=d(10), end_date=d(12))
+        self.client.force_login(self.user)
+
+    def _post(self, items):
+        return self.client.post('/booking/batch/', json.dumps({'items': items}), content_type='application/json')
+
+    def _item(self, room, start, end):
+        return {'location': room.pk, 'start': d(start).isoformat(), 'end': d(end).isoformat()}
+
+    def test_creates_all_with_one_overlap_query_and_one_email(self):
+        items = [self._item(room, 0, 3) for room in self.rooms] + [self._item(self.rooms[0], 5, 6)]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post(items)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['bookings']), 4)
+        self.assertEqual(Booking.objects.count(), 5)
+        overlap_queries = [q for q in ctx.captured_queries if '"start_date" <=' in q['sql']]
+        self.assertEqual(len(overlap_queries), 1)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+        self.assertIn('Room 2', OutboundEmail.objects.get().body)
+        # bulk_create без сигналів — календар усе одно оновлюється
+        self.assertEqual(availability.cached_busy_ranges(self.rooms[2].pk), [[d(0).isoformat(), d(3).isoformat()]])
+
+    def test_rejects_whole_batch_with_per_item_conflicts(self):
+        response = self._post([
+            self._item(self.rooms[0], 0, 3),
+            self._item(self.rooms[1], 11, 14),   # зайнято
+            self._item(self.rooms[0], 2, 4),     # перетин усередині пакета
+            self._item(self.rooms[2], 5, 1),     # переплутані дати
+            {'location': 0, 'start': d(0).isoformat(), 'end': d(1).isoformat()},
+        ])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(sorted(response.json()['errors']), ['1', '2', '3', '4'])
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(OutboundEmail.objects.count(), 0)
+
+    def test_exclusion_constraint_conflict_is_409(self):
+        # шлях PostgreSQL: перетин ловить exclusion constraint, а не перевірка в Python
+        error = IntegrityError(f'conflicting key value violates exclusion constraint "{availability.EXCLUSION_CONSTRAINT}"')
+        with mock.patch.object(Booking.objects, 'bulk_create', side_effect=error):
+            response = self._post([self._item(self.rooms[0], 0, 3)])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(list(response.json()['errors']), ['__all__'])
+
+    def test_malformed_payload(self):
+        self.assertEqual(self._post([]).status_code, 400)
+        response = self._post([{'location': self.rooms[0].pk, 'start': 'soon'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('0', response.json()['errors'])
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+        self.other = Location.objects.create(title='Other', capacity=2, price=50, description='')
+
+    def _snapshot(self):
+        return sorted(DailyOccupancy.objects.values_list(
+            'location_id', 'day', 'confirmed_nights', 'unconfirmed_nights', 'revenue'))
+
+    def test_incremental_matches_rebuild(self):
+        booking = Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(3))
+        Booking.objects.create(user=self.user, location=self.other, start_date=d(2), end_date=d(2),
+                               is_confirmed=True)
+        self.assertEqual(rollups.totals(d(0), d(9))['nights'], 4)
+
+        booking.end_date = d(5)
+        booking.is_confirmed = True
+        booking.save()
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(7), end_date=d(8)).delete()
+
+        incremental = self._snapshot()
+        rollups.rebuild()
+        self.assertEqual([row for row in incremental if row[2] or row[3]], self._snapshot())
+
+        totals = rollups.totals(d(0), d(9), self.room.pk)
+        self.assertEqual((totals['confirmed_nights'], totals['unconfirmed_nights']), (5, 0))
+        self.assertEqual(totals['revenue'], 500)
+        self.assertEqual(totals['occupancy'], 0.5)
+
+    def test_delete_location_with_bookings(self):
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(3))
+        Booking.objects.create(user=self.user, location=self.other, start_date=d(0), end_date=d(1))
+        self.room.delete()
+        Location.objects.filter(pk=self.other.pk).delete()
+        self.assertFalse(DailyOccupancy.objects.exists())
+        # зрізи не вставлені знову — FK не порушено
+        connection.check_constraints()
+
+    def test_batch_and_price_change(self):
+        availability.reserve_many(self.user, [(self.room.pk, d(0), d(2)), (self.other.pk, d(0), d(1))])
+        self.assertEqual(rollups.totals(d(0), d(9))['revenue'], 250)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.room.price = 200
+            self.room.save()
+        self.assertEqual(rollups.totals(d(0), d(9))['revenue'], 450)
+
+    def test_endpoints_read_only_rollups(self):
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(40))
+        Booking.objects.create(user=self.user, location=self.other, start_date=d(3), end_date=d(5))
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass12345'))
+
+        url = f'/analytics/occupancy/?start={d(0)}&end={d(59)}&period=month'
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(url).json()
+        self.assertFalse([q for q in ctx.captured_queries if 'booking_booking' in q['sql']])
+        self.assertEqual(data['totals']['nights'], 42)
+        self.assertEqual([row['nights'] for row in data['series']], [33, 9])
+
+        data = self.client.get(f'/analytics/locations/?start={d(0)}&end={d(9)}').json()
+        self.assertEqual([row['title'] for row in data['locations']], ['Room', 'Other'])
+        self.assertEqual(self.client.get('/analytics/occupancy/?start=2030-02-30').status_code, 400)
+        self.assertContains(self.client.get('/admin/booking/dailyoccupancy/'), 'Топ локацій')
+
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class BookingAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(self.admin)
+        self.rooms = [
+            Location.objects.create(title=f'Room {i}', capacity=2, price=100, description='') for i in range(3)
+        ]
+
+    def _add(self, count):
+        users = [User.objects.create_user(f'guest{User.objects.count()}') for _ in range(3)]
+        start = Booking.objects.count() * 3
+        Booking.objects.bulk_create([
+            Booking(user=users[i % 3], location=self.rooms[i % 3], start_date=d(start + i * 3),
+                    end_date=d(start + i * 3 + 1))
+            for i in range(count)
+        ])
+
+    def _changelist_queries(self, query=''):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/admin/booking/booking/' + query)
+        self.assertEqual(response.status_code, 200)
+        return response, ctx.captured_queries
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self._add(5)
+        self._changelist_queries()
+        _, small = self._changelist_queries()
+        self._add(60)
+        response, large = self._changelist_queries()
+        self.assertEqual(len(small), len(large))
+        self.assertLessEqual(len(large), 10)
+        # рахунок рядків обмежений LIMIT, без повного COUNT(*) по таблиці
+        counts = [q['sql'] for q in large if 'COUNT(' in q['sql'] and 'booking_booking' in q['sql']]
+        self.assertTrue(counts and all('LIMIT' in sql for sql in counts))
+        self.assertContains(response, 'data-filter-param="location__id__exact"')
+
+        _, filtered = self._changelist_queries(f'?location__id__exact={self.rooms[0].pk}')
+        # + одна локація для підпису вибраного значення фільтра
+        self.assertEqual(len(filtered), len(large) + 1)
+
+    def test_search_uses_matched_ids(self):
+        self._add(6)
+        response, queries = self._changelist_queries('?q=Room 1')
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+        self.assertFalse([q for q in queries if 'booking_booking' in q['sql'] and 'LIKE' in q['sql']])
+
+    def test_estimated_count_paginator(self):
+        self._add(30)
+        # видалені рядки (архівація) не дають фантомних сторінок, як MAX(pk)
+        Booking.objects.filter(pk__in=Booking.objects.order_by('-pk').values('pk')[:5]).delete()
+        paginator = EstimatedCountPaginator(Booking.objects.order_by('pk'), 10)
+        paginator.exact_limit = 20
+        self.assertEqual(paginator.count, 25)
+        paginator = EstimatedCountPaginator(Booking.objects.filter(location=self.rooms[0]).order_by('pk'), 10)
+        self.assertEqual(paginator.count, 9)
+
+        # без оцінки межа COUNT росте з поточною сторінкою — далекі сторінки досяжні
+        qs = Booking.objects.order_by('pk')
+        paginator = EstimatedCountPaginator(qs, 2, page_hint=5)
+        paginator.exact_limit, paginator.lookahead_pages = 5, 2
+        self.assertEqual(paginator.count, 15)
+        self.assertEqual(len(paginator.page(8).object_list), 1)
+        paginator = EstimatedCountPaginator(qs, 2, page_hint=12)
+        paginator.exact_limit, paginator.lookahead_pages = 5, 2
+        self.assertEqual(paginator.count, 25)
+
+    def test_search_reports_truncated_matches(self):
+        self._add(6)
+        with mock.patch('booking.admin.SEARCH_MATCH_LIMIT', 1):
+            response, _ = self._changelist_queries('?q=Room')
+        self.assertContains(response, 'враховано лише перші 1')
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='')
+        self.today = datetime.date.today()
+        # 30 давніх і 5 недавніх минулих бронювань, одне активне
+        for i in range(35):
+            start = self.today - datetime.timedelta(days=(400 if i < 30 else 40) + 3 * i)
+            Booking.objects.create(user=self.user, location=self.room, start_date=start,
+                                   end_date=start + datetime.timedelta(days=1))
+        Booking.objects.create(user=self.user, location=self.room, start_date=d(0), end_date=d(1))
+
+    def _past_pages(self):
+        self.client.force_login(self.user)
+        pages, page = [], 1
+        while True:
+            response = self.client.get('/profile/', {'past_page': page})
+            pages.append([(b.pk, b.end_date) for b in response.context['past_bookings']])
+            if not response.context['past_has_next']:
+                return pages
+            page += 1
+
+    def test_archive_moves_old_rows_in_chunks(self):
+        before_pages = self._past_pages()
+        before_rollups = rollups.totals(self.today - datetime.timedelta(days=600), self.today)
+
+        out = io.StringIO()
+        call_command('archive_bookings', '--days', '365', '--chunk-size', '7', stdout=out)
+        self.assertEqual(BookingArchive.objects.count(), 30)
+        self.assertEqual(Booking.objects.count(), 6)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len([line for line in lines if line.startswith('chunk=')]), 5)
+        self.assertIn('archived=30', lines[-1])
+        self.assertIn('max_lock_ms=', lines[-1])
+
+        # профіль гортається так само, частина сторінок — з архіву
+        self.assertEqual(self._past_pages(), before_pages)
+        self.assertEqual([len(page) for page in before_pages], [20, 15])
+        # історія в зрізах не змінюється ні архівацією, ні перебудовою
+        self.assertEqual(rollups.totals(self.today - datetime.timedelta(days=600), self.today), before_rollups)
+        rollups.rebuild()
+        self.assertEqual(rollups.totals(self.today - datetime.timedelta(days=600), self.today), before_rollups)
+
+        # повторний запуск нічого не переносить
+        out = io.StringIO()
+        call_command('archive_bookings', '--days', '365', stdout=out)
+        self.assertIn('archived=0', out.getvalue())
+
+
+# у тестах LocMem спільний для всього процесу — як Redis для одного воркера
+@override_settings(USER_CACHE_TIMEOUT=60, SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class UserCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.client.force_login(self.user)
+
+    def _auth_queries(self, path='/profile/'):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        sqls = [q['sql'] for q in ctx.captured_queries]
+        return response, [sql for sql in sqls if '"auth_user"' in sql or '"django_session"' in sql]
+
+    def test_warm_request_skips_session_and_user_queries(self):
+        self._auth_queries()
+        response, queries = self._auth_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'].pk, self.user.pk)
+        self.assertEqual(queries, [])
+
+    @override_settings(USER_CACHE_TIMEOUT=0)
+    def test_disabled_cache_loads_user_every_request(self):
+        self._auth_queries()
+        _, queries = self._auth_queries()
+        self.assertEqual(len(queries), 1)
+
+    def test_password_change_logs_out_cached_sessions(self):
+        self._auth_queries()
+        self.user.set_password('new-pass-67890')
+        self.user.save()
+        response = self.client.get('/profile/')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/accounts/login/', response['Location'])
+
+    def test_deactivation_and_activate_invalidate(self):
+        self._auth_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/profile/').status_code, 302)
+
+        version = caching.get_version(f'auth-user:{self.user.pk}')
+        uid = urlsafe_base64_encode(force_bytes(self.user.pk))
+        token = default_token_generator.make_token(self.user)
+        self.client.get(f'/activate/{uid}/{token}/')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertGreater(caching.get_version(f'auth-user:{self.user.pk}'), version)
+
+    def test_shared_cache_checks(self):
+        self.assertEqual([e.id for e in checks.shared_cache_check(None)], ['booking.E001', 'booking.E002'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(checks.shared_cache_check(None), [])
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db', USER_CACHE_TIMEOUT=0):
+            self.assertEqual(checks.shared_cache_check(None), [])
+
+    def test_cached_user_is_a_copy(self):
+        self._auth_queries()
+        response, _ = self._auth_queries()
+        response.context['user'].first_name = 'changed'
+        response, _ = self._auth_queries()
+        self.assertEqual(response.context['user'].first_name, '')
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Location.objects.create(title='Room', capacity=2, price=100, description='Тихий номер')
+
+    def test_card_and_header_follow_location_changes(self):
+        self.assertContains(self.client.get('/rooms/'), 'Room')
+        self.assertContains(self.client.get(f'/rooms/{self.room.pk}/'), '100')
+
+        self.room.title = 'Suite'
+        self.room.price = 250
+        self.room.save()
+        self.assertContains(self.client.get('/rooms/'), 'Suite')
+        response = self.client.get(f'/rooms/{self.room.pk}/')
+        self.assertContains(response, 'Suite')
+        self.assertContains(response, '250')
+
+    def test_cached_card_skips_rendering(self):
+        self.client.get('/rooms/')
+        key = make_template_fragment_key('room_card', [self.room.pk, self.room.updated_at.timestamp()])
+        self.assertIn('Room', cache.get(key))
+        # фрагмент береться з кешу, навіть якщо сторінка рендериться заново
+        cache.set(key, '<p>з кешу</p>')
+        caching.invalidate_locations()
+        self.assertContains(self.client.get('/rooms/'), 'з кешу')
+
+    def test_saved_derivatives_bump_version(self):
+        self.room.image = 'room_images/a.jpg'
+        self.room.save()
+        before = Location.objects.get(pk=self.room.pk).updated_at
+        images.save_derivatives(self.room.pk, 'room_images/a.jpg', {'source': 'room_images/a.jpg'})
+        self.assertGreater(Location.objects.get(pk=self.room.pk).updated_at, before)
+
+    def test_email_templates_are_compiled_once(self):
+        templates = outbox.prepare_templates()
+        self.assertEqual([t.template.name for t in templates], list(outbox.EMAIL_TEMPLATES))
+        user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        email = outbox.enqueue('Активація акаунта', 'activation_email.html',
+                               {'user': user, 'activation_link': 'http://x/'}, to=[user.email])
+        self.assertIn('guest', email.body)
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.sea = Location.objects.create(title='Морська кімната', capacity=2, price=100,
+                                           description='Балкон з видом на море.')
+        self.quiet = Location.objects.create(title='Тихий номер', capacity=2, price=100,
+                                             description="Затишна кімната, пам’ять про ґанок і море.")
+
+    def test_ukrainian_normalization(self):
+        self.assertEqual(search.tokens('кімнатою'), search.tokens('Кімната'))
+        self.assertEqual(search.tokens('затишний'), search.tokens('затишна'))
+        self.assertEqual(search.tokens("пам’ять"), search.tokens("пам'ять"))
+        self.assertEqual(search.tokens('ґанок'), search.tokens('ганок'))
+
+    def test_ranked_by_title_then_description(self):
+        self.assertEqual(search.ranked_ids('кімнатою'), [self.sea.pk, self.quiet.pk])
+        self.assertEqual(search.ranked_ids("пам'ят"), [self.quiet.pk])
+        self.assertEqual(search.ranked_ids('затиш мор'), [self.quiet.pk])
+        self.assertEqual(search.ranked_ids('   '), [])
+
+    def test_signals_keep_index_in_sync(self):
+        self.quiet.description = 'Вид на парк.'
+        self.quiet.save()
+        self.assertEqual(search.ranked_ids('затишна'), [])
+        self.assertEqual(search.ranked_ids('парку'), [self.quiet.pk])
+        self.quiet.is_active = False
+        self.quiet.save()
+        self.assertEqual(search.ranked_ids('парк'), [])
+        self.assertEqual(search.ranked_ids('парк', active_only=False), [self.quiet.pk])
+        pk = self.quiet.pk
+        self.quiet.delete()
+        self.assertEqual(search.ranked_ids('парк', active_only=False), [])
+        self.assertNotIn(pk, search.ranked_ids('море'))
+
+    def test_rebuild_command_indexes_bulk_created_rows(self):
+        Location.objects.bulk_create([Location(title='Гірська хатина', capacity=4, price=300, description='')])
+        self.assertEqual(search.ranked_ids('хатина'), [])
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('indexed=3', out.getvalue())
+        self.assertEqual(len(search.ranked_ids('хатину')), 1)
+
+    def test_room_list_query(self):
+        response = self.client.get('/rooms/', {'q': 'море', 'format': 'json'})
+        self.assertEqual([r['id'] for r in response.json()['results']], [self.sea.pk, self.quiet.pk])
+        response = self.client.get('/rooms/', {'q': 'затишна'})
+        self.assertEqual([room.pk for room in response.context['rooms_list']], [self.quiet.pk])
+        self.assertNotContains(response, 'Морська кімната')
+
+    def test_admin_search_uses_index(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pass12345')
+        self.client.force_login(admin_user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/admin/booking/location/', {'q': 'затишн'})
+        self.assertEqual([room.pk for room in response.context['cl'].result_list], [self.quiet.pk])
+        self.assertFalse(any('LIKE' in q['sql'] and 'booking_location' in q['sql'] for q in ctx.captured_queries))
+
+
+class SyncFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Location.objects.create(title='Room, sea; view', capacity=2, price=100, description='')
+        self.other = Location.objects.create(title='Other', capacity=2, price=100, description='')
+
+    def _book(self, room, start, end):
+        return Booking.objects.create(user=self.user, location=room, start_date=d(start), end_date=d(end))
+
+    def _changes(self, since='', **params):
+        # без затримки проти незакомічених транзакцій — тест бачить усе одразу
+        with override_settings(SYNC_FEED_LAG_SECONDS=-60):
+            response = self.client.get('/feeds/bookings/', {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content)), response
+
+    def test_delta_feed_with_cursor_and_tombstones(self):
+        first = self._book(self.room, 1, 2)
+        second = self._book(self.other, 5, 6)
+        data, _ = self._changes()
+        self.assertEqual([(c['id'], c['status']) for c in data['changes']],
+                         [(first.pk, 'booked'), (second.pk, 'booked')])
+        cursor = data['next_cursor']
+
+        # нічого нового — порожня сторінка і той самий курсор
+        data, _ = self._changes(cursor)
+        self.assertEqual(data['changes'], [])
+        self.assertEqual(data['next_cursor'], cursor)
+
+        self.client.force_login(self.user)
+        self.client.post(f'/booking/{first.pk}/cancel/')
+        second.is_confirmed = True
+        second.save()
+        data, _ = self._changes(cursor)
+        self.assertEqual([(c['id'], c['status'], c['is_confirmed']) for c in data['changes']],
+                         [(first.pk, 'cancelled', False), (second.pk, 'booked', True)])
+
+        data, _ = self._changes(cursor, location=self.room.pk)
+        self.assertEqual([(c['id'], c['status']) for c in data['changes']], [(first.pk, 'cancelled')])
+
+    def test_pages_do_not_skip_equal_timestamps(self):
+        Booking.objects.bulk_create([
+            Booking(user=self.user, location=self.room, start_date=d(i * 3), end_date=d(i * 3 + 1))
+            for i in range(5)
+        ])
+        Booking.objects.update(updated_at=timezone.now() - datetime.timedelta(minutes=1))
+        seen, cursor = [], ''
+        with override_settings(SYNC_FEED_PAGE_SIZE=2):
+            while True:
+                data, _ = self._changes(cursor)
+                seen += [c['id'] for c in data['changes']]
+                cursor = data['next_cursor']
+                if not data['has_more']:
+                    break
+        self.assertEqual(sorted(seen), sorted(Booking.objects.values_list('pk', flat=True)))
+        self.assertEqual(len(seen), 5)
+
+    def test_empty_poll_is_one_query_and_etag(self):
+        self._book(self.room, 1, 2)
+        data, _ = self._changes()
+        with CaptureQueriesContext(connection) as ctx:
+            _, response = self._changes(data['next_cursor'])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('UNION ALL', ctx.captured_queries[0]['sql'])
+        with override_settings(SYNC_FEED_LAG_SECONDS=-60):
+            cached = self.client.get('/feeds/bookings/', {'since': data['next_cursor']},
+                                     HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_recent_changes_wait_for_lag(self):
+        self._book(self.room, 1, 2)
+        with override_settings(SYNC_FEED_LAG_SECONDS=60):
+            response = self.client.get('/feeds/bookings/')
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['changes'], [])
+
+    def test_tombstone_retention_and_expired_cursor(self):
+        self._book(self.room, 1, 2).delete()
+        self._book(self.room, 3, 4).delete()
+        BookingTombstone.objects.filter(pk=BookingTombstone.objects.order_by('pk').first().pk).update(
+            deleted_at=timezone.now() - datetime.timedelta(days=400))
+
+        out = io.StringIO()
+        call_command('archive_bookings', '--tombstone-days', '365', '--chunk-size', '1', stdout=out)
+        self.assertIn('tombstones_pruned=1', out.getvalue())
+        self.assertEqual(BookingTombstone.objects.count(), 1)
+
+        stale = feeds.encode_cursor(timezone.now() - datetime.timedelta(days=400), feeds.BOOKED, 1)
+        self.assertEqual(self.client.get('/feeds/bookings/', {'since': stale}).status_code, 410)
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get('/feeds/bookings/', {'since': 'nonsense'}).status_code, 400)
+        self.assertEqual(self.client.get('/feeds/bookings/', {'location': 'x'}).status_code, 400)
+
+    def test_ical_feed(self):
+        booking = self._book(self.room, 1, 3)
+        self._book(self.other, 1, 3)
+        response = self.client.get(f'/rooms/{self.room.pk}/calendar.ics')
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn('X-WR-CALNAME:Room\\, sea\; view\r\n', body)
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+        self.assertIn(f'UID:booking-{booking.pk}@testserver', body)
+        self.assertIn(f'DTSTART;VALUE=DATE:{d(1):%Y%m%d}', body)
+        self.assertIn(f'DTEND;VALUE=DATE:{d(4):%Y%m%d}', body)
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(f'/rooms/{self.room.pk}/calendar.ics', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        booking.delete()
+        response = self.client.get(f'/rooms/{self.room.pk}/calendar.ics', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('BEGIN:VEVENT', b''.join(response.streaming_content).decode())
+
+    def test_ical_lines_are_folded(self):
+        line = feeds._fold('X-WR-CALNAME:' + 'Кімната' * 20)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in line.rstrip('\r\n').split('\r\n')))
+        self.assertEqual(line.replace('\r\n ', ''), 'X-WR-CALNAME:' + 'Кімната' * 20 + '\r\n')
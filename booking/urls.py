@@ -1,6 +1,4 @@
 from django.urls import path
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib.auth.views import LoginView, LogoutView
 from . import views
 
@@ -9,17 +7,22 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('activate/<uidb64>/<token>/', views.activate, name='activate'),
     path('rooms/', views.room_list, name='room_list'),
+    path('rooms/search/', views.room_search, name='room_search'),
     path('rooms/<int:pk>/', views.location_detail, name='location_detail'),
+    path('rooms/<int:pk>/availability/', views.location_availability, name='location_availability'),
+    path('rooms/<int:pk>/calendar.ics', views.location_ical, name='location_ical'),
+    path('feeds/bookings/', views.booking_changes, name='booking_changes'),
     path('booking/<int:pk>/create/', views.booking_create, name='booking_create'),
+    path('booking/batch/', views.booking_batch, name='booking_batch'),
     path('booking/<int:pk>/success/', views.booking_success, name='booking_success'),
     path('profile/', views.profile, name='profile'),
     path('booking/<int:pk>/cancel/', views.cancel_booking, name='cancel_booking'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('analytics/occupancy/', views.analytics_occupancy, name='analytics_occupancy'),
+    path('analytics/locations/', views.analytics_locations, name='analytics_locations'),
 
 
     path('accounts/login/', LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('accounts/logout/', LogoutView.as_view(), name='logout'),
 ]
 
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,38 +1,111 @@
-import datetime
+import hashlib
 import json
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import EmailMessage
 from django.utils.encoding import force_bytes, force_str
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib.sites.shortcuts import get_current_site
-from django.template.loader import render_to_string
 from django.contrib import messages
 from django.utils.dateparse import parse_date
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import BooleanField, Case, Count, F, Q, Value, When, Window
+from django.db.models.functions import RowNumber
 from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from datetime import date
 
-from booking.models import Location, Booking
-from .forms import UserRegisterForm
+from booking.models import Location, Booking, BookingArchive
+from . import availability, caching, feeds, metrics, outbox, rollups, search
+from .forms import AvailabilitySearchForm, UserRegisterForm
+from .pagination import KeysetPage, decode_cursor
+from .ratelimit import ratelimit
+
+
+PROFILE_PAST_PAGE_SIZE = 20
 
 
 @login_required
 def profile(request):
     user = request.user
-    active_bookings = user.bookings.filter(end_date__gte=date.today()).select_related('location')
-    past_bookings = user.bookings.filter(end_date__lt=date.today()).select_related('location')
+    try:
+        past_page = max(int(request.GET.get("past_page", 1)), 1)
+    except ValueError:
+        past_page = 1
+
+    active_bookings, past_bookings, past_has_next = profile_bookings(user, past_page, PROFILE_PAST_PAGE_SIZE)
 
     context = {
         'user': user,
         'active_bookings': active_bookings,
         'past_bookings': past_bookings,
+        'past_page': past_page,
+        'past_has_previous': past_page > 1,
+        'past_has_next': past_has_next,
     }
     return render(request, 'profile.html', context)
 
 
+def profile_bookings(user, past_page, per_page):
+    """Активні бронювання і сторінка минулих: (active, past, has_next).
+
+    Case/When ділить бронювання на активні й минулі, віконні функції
+    нумерують минулі й рахують їх кількість, тож обрізка сторінки й
+    загальна кількість приходять у тому ж запиті. Перший минулий рядок
+    повертається завжди — з ним приходить кількість, навіть коли сторінка
+    вже за межами основної таблиці.
+
+    Минулі бронювання, перенесені в BookingArchive, старші за ті, що лишились
+    у Booking, тож архів дочитується після них — лише коли сторінка туди сягає.
+    """
+    today = date.today()
+    is_current = Case(When(end_date__gte=today, then=Value(True)), default=Value(False),
+                      output_field=BooleanField())
+    offset = (past_page - 1) * per_page
+    rows = (
+        Booking.objects.filter(user=user)
+        .select_related('location')
+        .only('start_date', 'end_date', 'location__title', 'location__number')
+        .annotate(
+            is_current=is_current,
+            row=Window(RowNumber(), partition_by=[is_current], order_by=[F('end_date').desc(), F('pk').desc()]),
+            group_total=Window(Count('pk'), partition_by=[is_current]),
+        )
+        .filter(Q(is_current=True) | Q(row__gt=offset, row__lte=offset + per_page) | Q(row=1))
+        .order_by('start_date', 'pk')
+    )
+
+    active, past, live_total = [], [], 0
+    for booking in rows:
+        if booking.is_current:
+            active.append(booking)
+        else:
+            live_total = booking.group_total
+            if booking.row > offset:
+                past.append(booking)
+    past.sort(key=lambda b: (b.end_date, b.pk), reverse=True)
+
+    if offset + per_page < live_total:
+        return active, past, True
+
+    # решта сторінки — з архіву; один зайвий рядок показує, чи є наступна
+    archive_offset = max(offset - live_total, 0)
+    need = per_page - len(past)
+    archived = list(
+        BookingArchive.objects.filter(user=user)
+        .select_related('location')
+        .only('start_date', 'end_date', 'location__title', 'location__number')
+        .order_by('-end_date', '-pk')[archive_offset:archive_offset + need + 1]
+    )
+    return active, past + archived[:need], len(archived) > need
+
+
 @login_required
 def cancel_booking(request, pk):
     booking = get_object_or_404(Booking, pk=pk, user=request.user)
@@ -45,32 +118,27 @@ def cancel_booking(request, pk):
     return render(request, 'cancel_booking_confirm.html', {'booking': booking})
 
 
+@ratelimit('register')
 def register(request):
     if request.method == "POST":
         form = UserRegisterForm(request.POST)
         if form.is_valid():
-            user = form.save(commit=False)
-            user.is_active = False
-            user.save()
-
-            token = default_token_generator.make_token(user)
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            current_site = get_current_site(request)
-            activation_link = f"http://{current_site.domain}/activate/{uid}/{token}/"
-
-            html_message = render_to_string('activation_email.html', {
-                'user': user,
-                'activation_link': activation_link,
-            })
-
-            email = EmailMessage(
-                subject='Активація акаунта',
-                body=html_message,
-                from_email=None,
-                to=[user.email],
-            )
-            email.content_subtype = "html"
-            email.send(fail_silently=False)
+            # лист потрапляє в outbox у тій самій транзакції, що й користувач;
+            # відправляє його воркер send_outbox
+            with transaction.atomic():
+                user = form.save(commit=False)
+                user.is_active = False
+                user.save()
+
+                token = default_token_generator.make_token(user)
+                uid = urlsafe_base64_encode(force_bytes(user.pk))
+                current_site = get_current_site(request)
+                activation_link = f"http://{current_site.domain}/activate/{uid}/{token}/"
+
+                outbox.enqueue('Активація акаунта', 'activation_email.html', {
+                    'user': user,
+                    'activation_link': activation_link,
+                }, to=[user.email])
 
             messages.success(request, 'Перевірте вашу пошту для активації акаунта.')
             return redirect('login')
@@ -79,6 +147,7 @@ def register(request):
     return render(request, 'register.html', {'form': form})
 
 
+@ratelimit('activate')
 def activate(request, uidb64, token):
     try:
         uid = force_str(urlsafe_base64_decode(uidb64))
@@ -96,14 +165,120 @@ def activate(request, uidb64, token):
         return redirect('register')
 
 
+# Умовні GET для сторінок кімнат: повторний візит з тим самим ETag отримує 304
+# без рендерингу. Сторінки містять шапку користувача й CSRF-токен, тому
+# користувач входить до ETag.
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(":".join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+
+
+def location_validators(room, version, state, user_id=None):
+    """(ETag, Last-Modified) сторінки кімнати; state — availability.booking_state()."""
+    latest = state["latest"]
+    # календар показується від сьогодні, тож з новим днем змінюється і вміст
+    etag = make_etag(room.pk, version, latest and latest.timestamp(), state["total"], user_id, date.today())
+    return etag, max(filter(None, (room.created_at, latest)))
+
+
+def not_modified(request, etag, last_modified):
+    """304 (або 412), якщо клієнт уже має актуальну версію; інакше None."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(request, response, etag, last_modified):
+    if request.method in ("GET", "HEAD"):
+        response.headers.setdefault("ETag", etag)
+        if last_modified:
+            response.headers.setdefault("Last-Modified", http_date(int(last_modified.timestamp())))
+    return response
+
+
+def conditional_response(request, etag, last_modified, respond):
+    """Як @condition, але валідатори вже пораховані: 304 без виклику respond()."""
+    response = not_modified(request, etag, last_modified) or respond()
+    return set_validators(request, response, etag, last_modified)
+
+
+ROOM_LIST_PAGE_SIZE = 24
+
+
 def room_list(request):
-    rooms = Location.objects.all()
-    return render(request, "room_list.html", {"rooms_list": rooms})
+    query = request.GET.get("q", "").strip()
+    cursor = request.GET.get("after", "")
+    if cursor and decode_cursor(cursor) is None:
+        cursor = ""
+    version = caching.get_version(caching.LOCATIONS)
+    # картка показує лише ці поля; description не вантажимо
+    rooms = Location.objects.only("pk", "number", "title", "capacity", "price", "updated_at")
+
+    def respond():
+        if query:
+            # ?q= — повнотекстовий пошук (booking.search), найрелевантніші першими
+            rooms_list = search.search(query, limit=ROOM_LIST_PAGE_SIZE, queryset=rooms)
+            if request.GET.get("format") == "json":
+                return JsonResponse({"results": [
+                    {"id": room.pk, "title": room.title, "number": room.number,
+                     "capacity": room.capacity, "price": str(room.price)}
+                    for room in rooms_list
+                ]})
+        else:
+            rooms_list = KeysetPage(rooms, cursor, ROOM_LIST_PAGE_SIZE)
+        return render(request, "room_list.html", {
+            "rooms_list": rooms_list,
+            "cursor": cursor,
+            "query": query,
+            "locations_version": version,
+        })
+
+    etag = make_etag("rooms", version, cursor, query, request.GET.get("format"), request.user.pk)
+    return conditional_response(request, etag, None, respond)
+
+
+def room_search(request):
+    form = AvailabilitySearchForm(request.GET or None)
+    page = None
+    if form.is_valid():
+        data = form.cleaned_data
+        rooms = availability.free_locations(
+            data['check_in'],
+            data['check_out'],
+            guests=data['guests'],
+            min_price=data['min_price'],
+            max_price=data['max_price'],
+            order_by=data['sort'] or 'price',
+        )
+        page = Paginator(rooms, 12).get_page(request.GET.get('page'))
+
+    if request.GET.get('format') == 'json':
+        if page is None:
+            return JsonResponse({"errors": form.errors}, status=400)
+        return JsonResponse({
+            "results": [
+                {"id": room.pk, "title": room.title, "number": room.number,
+                 "capacity": room.capacity, "price": str(room.price)}
+                for room in page
+            ],
+            "page": page.number,
+            "num_pages": page.paginator.num_pages,
+        })
+
+    query = request.GET.copy()
+    query.pop('page', None)
+    return render(request, "room_search.html", {
+        "form": form,
+        "page": page,
+        "query": query.urlencode(),
+    })
 
 
 @login_required
+@ratelimit('booking_create')
 def booking_create(request, pk):
-    room = get_object_or_404(Location, pk=pk)
+    room = caching.get_location(pk)
+    if room is None:
+        raise Http404
 
     if request.method == "POST":
         start_date_str = request.POST.get("start_time")
@@ -122,69 +297,209 @@ def booking_create(request, pk):
             context = {"room": room, "start_time": start_date_str, "end_time": end_date_str}
             return render(request, "location_detail.html", context)
 
-        overlapping_bookings = Booking.objects.filter(
-            location=room,
-            start_date__lte=end_date,
-            end_date__gte=start_date,
-        )
-
-        if overlapping_bookings.exists():
+        # перевірка перетину виконується один раз — у Booking.clean() під блокуванням локації;
+        # лист ставиться в outbox у тій самій транзакції, що й бронювання
+        try:
+            with availability.location_lock(room.pk):
+                booking = availability.reserve(request.user, room.pk, start_date, end_date)
+                outbox.enqueue('Підтвердження бронювання', 'booking_confirmation_email.html', {
+                    'user': request.user,
+                    'booking': booking,
+                }, to=[request.user.email])
+        except ValidationError:
             messages.error(request, "Ця кімната вже заброньована на вибраний період.")
             context = {"room": room, "start_time": start_date_str, "end_time": end_date_str}
             return render(request, "location_detail.html", context)
 
-        booking = Booking.objects.create(
-            user=request.user,
-            location=room,
-            start_date=start_date,
-            end_date=end_date
-        )
-
-        html_message = render_to_string('booking_confirmation_email.html', {
-            'user': request.user,
-            'booking': booking,
-        })
-
-        email = EmailMessage(
-            subject='Підтвердження бронювання',
-            body=html_message,
-            from_email=None,
-            to=[request.user.email],
-        )
-        email.content_subtype = "html"
-        email.send(fail_silently=False)
-
         messages.success(request, "Бронювання успішно створено! Підтвердження надіслано на вашу пошту.")
         return redirect("booking_success", pk=booking.id)
 
     return redirect('location_detail', pk=pk)
 
 
+def _parse_batch(body):
+    """[(location_id, start, end), ...] з JSON-тіла та помилки розбору за індексом."""
+    try:
+        raw = json.loads(body).get("items")
+    except (ValueError, AttributeError):
+        raw = None
+    if not isinstance(raw, list) or not raw:
+        return None, {"items": ["Очікується непорожній список items."]}
+    if len(raw) > settings.BOOKING_BATCH_MAX_ITEMS:
+        return None, {"items": [f"Не більше {settings.BOOKING_BATCH_MAX_ITEMS} елементів за раз."]}
+
+    items, errors = [], {}
+    for index, item in enumerate(raw):
+        try:
+            location_id = int(item["location"])
+            start_date, end_date = parse_date(item["start"]), parse_date(item["end"])
+        except (KeyError, TypeError, ValueError):
+            location_id = start_date = end_date = None
+        if start_date is None or end_date is None:
+            errors[str(index)] = ["Потрібні location, start і end у форматі РРРР-ММ-ДД."]
+        items.append((location_id, start_date, end_date))
+    return items, errors
+
+
+@login_required
+@ratelimit("booking_batch")
+def booking_batch(request):
+    """Кілька бронювань одним запитом: усі створюються або жодне.
+
+    POST {"items": [{"location": 1, "start": "2030-01-01", "end": "2030-01-03"}, ...]}
+    -> 201 {"bookings": [...]} або 400/409 {"errors": {"<індекс>": [...]}}.
+    """
+    if request.method != "POST":
+        return JsonResponse({"errors": {"method": ["Лише POST."]}}, status=405)
+
+    items, errors = _parse_batch(request.body)
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+
+    try:
+        with availability.location_lock(*{location_id for location_id, _start, _end in items}):
+            bookings = availability.reserve_many(request.user, items)
+            rooms = Location.objects.only("title").in_bulk({booking.location_id for booking in bookings})
+            for booking in bookings:
+                booking.location = rooms[booking.location_id]
+            # один лист на весь пакет, у тій самій транзакції
+            outbox.enqueue("Підтвердження бронювань", "batch_booking_confirmation_email.html", {
+                "user": request.user,
+                "bookings": bookings,
+            }, to=[request.user.email])
+    except ValidationError as exc:
+        conflicts = {key: [str(message) for message in messages] for key, messages in exc.message_dict.items()}
+        return JsonResponse({"errors": conflicts}, status=409)
+
+    return JsonResponse({
+        "bookings": [
+            {"id": booking.pk, "location": booking.location_id,
+             "start": booking.start_date.isoformat(), "end": booking.end_date.isoformat()}
+            for booking in bookings
+        ],
+    }, status=201)
+
+
 def booking_success(request, pk):
     booking = get_object_or_404(Booking, id=pk)
     return render(request, "booking_success.html")
 
 
 def location_detail(request, pk):
-    room = get_object_or_404(Location, pk=pk)
+    room = caching.get_location(pk)
+    if room is None:
+        raise Http404
+
+    def respond():
+        # зайняті періоди віддаємо злитими діапазонами [start, end], а не по днях
+        busy_ranges_json = json.dumps(availability.cached_busy_ranges(room.pk), cls=DjangoJSONEncoder)
+        return render(request, "location_detail.html", {
+            "room": room,
+            "busy_ranges_json": busy_ranges_json,
+        })
+
+    version = caching.get_version(caching.LOCATIONS)
+    etag, last_modified = location_validators(room, version, availability.booking_state(room.pk), request.user.pk)
+    return conditional_response(request, etag, last_modified, respond)
+
+
+def location_availability(request, pk):
+    room = caching.get_location(pk)
+    if room is None:
+        raise Http404
 
-    bookings = room.bookings.filter(end_date__gte=date.today())
+    def respond():
+        return JsonResponse({"location": room.pk, "busy": availability.cached_busy_ranges(room.pk)})
 
-    busy_dates = []
-    for booking in bookings:
-        current_date = booking.start_date
-        while current_date <= booking.end_date:
-            busy_dates.append(current_date.strftime('%Y-%m-%d'))
-            current_date += datetime.timedelta(days=1)
+    etag, last_modified = location_validators(room, caching.get_version(caching.LOCATIONS), availability.booking_state(room.pk))
+    return conditional_response(request, etag, last_modified, respond)
 
-    busy_dates_json = json.dumps(busy_dates, cls=DjangoJSONEncoder)
 
-    return render(request, "location_detail.html", {
-        "room": room,
-        "bookings": bookings,
-        "busy_dates_json": busy_dates_json,
+# Фіди для партнерських каналів (booking.feeds). Обидва віддаються потоком і
+# відповідають 304 на If-None-Match.
+
+def location_ical(request, pk):
+    room = caching.get_location(pk)
+    if room is None or not room.is_active:
+        raise Http404
+
+    def respond():
+        response = StreamingHttpResponse(
+            feeds.ical(room, feeds.calendar_bookings(room.pk), request.get_host()),
+            content_type="text/calendar; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'inline; filename="room-{room.pk}.ics"'
+        return response
+
+    # ті самі валідатори, що й у сторінки кімнати: 304 без запиту до бронювань
+    etag, last_modified = location_validators(room, caching.get_version(caching.LOCATIONS), availability.booking_state(room.pk))
+    return conditional_response(request, etag, last_modified, respond)
+
+
+def booking_changes(request):
+    """Бронювання, змінені чи скасовані після ?since= (курсор з попередньої відповіді)."""
+    since = request.GET.get("since", "")
+    cursor = feeds.decode_cursor(since) if since else None
+    if since and cursor is None:
+        return JsonResponse({"errors": {"since": ["Некоректний курсор."]}}, status=400)
+    if cursor is not None and feeds.is_expired(cursor):
+        # старші скасування вже видалено — курсор міг би їх пропустити
+        return JsonResponse({"errors": {"since": ["Курсор застарів, потрібна повна синхронізація."]}}, status=410)
+    try:
+        location_id = int(request.GET["location"]) if request.GET.get("location") else None
+    except ValueError:
+        return JsonResponse({"errors": {"location": ["Некоректна локація."]}}, status=400)
+
+    rows, has_more = feeds.changes(cursor, location_id)
+    next_cursor = feeds.next_cursor(rows, since)
+
+    def respond():
+        return StreamingHttpResponse(
+            feeds.stream_changes(rows, next_cursor, has_more), content_type="application/json"
+        )
+
+    etag = make_etag("changes", since, location_id, next_cursor, len(rows), has_more)
+    return conditional_response(request, etag, None, respond)
+
+
+@staff_member_required
+def analytics_occupancy(request):
+    """Заповненість і виручка за період з денних зрізів: підсумок і ряд по днях/місяцях."""
+    start, end, error = rollups.parse_range(request.GET)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+    try:
+        location_id = int(request.GET["location"]) if request.GET.get("location") else None
+    except ValueError:
+        return JsonResponse({"error": "Некоректна локація."}, status=400)
+    period = "month" if request.GET.get("period") == "month" else "day"
+    return JsonResponse({
+        "start": start,
+        "end": end,
+        "location": location_id,
+        "totals": rollups.totals(start, end, location_id),
+        "series": rollups.series(start, end, location_id, period),
+    })
+
+
+@staff_member_required
+def analytics_locations(request):
+    """Локації за виручкою за період."""
+    start, end, error = rollups.parse_range(request.GET)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+    return JsonResponse({
+        "start": start,
+        "end": end,
+        "locations": rollups.by_location(start, end, limit=100),
     })
 
 
+def metrics_view(request):
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.render_all(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def index(request):
     return render(request, 'index.html')
\ No newline at end of file
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,12 +43,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'booking.middleware.PerformanceMiddleware',
+    'booking.middleware.AsyncViewsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'booking.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'booking.ratelimit.RateLimitMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -69,19 +72,157 @@ TEMPLATES = [
     },
 ]
 
+# TEMPLATE_MODE=production: скомпільовані шаблони живуть у пам'яті процесу (cached
+# loader без перевірки файлів), debug-інформація шаблонів вимкнена. debug — поведінка
+# Django за замовчуванням; uncached — компіляція з диска на кожен рендер (для порівняння
+# в bench_templates). Фрагменти {% cache %} лежать у кеші 'default'.
+TEMPLATE_MODE = config('TEMPLATE_MODE', default='debug')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_MODE in ('production', 'uncached'):
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['debug'] = TEMPLATE_MODE != 'production'
+    TEMPLATES[0]['OPTIONS']['loaders'] = (
+        [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)] if TEMPLATE_MODE == 'production'
+        else TEMPLATE_LOADERS
+    )
+
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# Профіль обирається змінною DB_PROFILE:
+#   sqlite        — файл SQLite з WAL, synchronous=NORMAL, busy timeout і mmap
+#                   (PRAGMA виставляє booking.signals.tune_sqlite);
+#   sqlite-basic  — SQLite з налаштуваннями Django за замовчуванням (для порівняння);
+#   postgres      — PostgreSQL з постійними з'єднаннями і health checks.
+DB_PROFILE = config('DB_PROFILE', default='sqlite')
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='booking'),
+            'USER': config('DB_USER', default='booking'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': 0 if DB_PROFILE == 'sqlite-basic' else config('DB_CONN_MAX_AGE', default=600, cast=int),
+            'CONN_HEALTH_CHECKS': DB_PROFILE != 'sqlite-basic',
+        }
+    }
+
+SQLITE_PRAGMAS = {} if DB_PROFILE == 'sqlite-basic' else {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int),
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='booking'),
     }
 }
 
+AVAILABILITY_CACHE_ALIAS = 'default'
+AVAILABILITY_CACHE_TIMEOUT = config('AVAILABILITY_CACHE_TIMEOUT', default=300, cast=int)
+# Кеш локацій (booking.caching) інвалідується версією в CACHES['default']. Зі
+# спільним кешем (Redis/Memcached) зміна в адмінці одразу видна всім воркерам,
+# і записи можуть жити годину. З LocMem (як caching.LOCAL_BACKENDS) версія своя
+# в кожному процесі — інші воркери бачать стару локацію (is_active, ціну) до
+# кінця TTL, тому за замовчуванням він лише кілька секунд.
+LOCATION_CACHE_TIMEOUT = config(
+    'LOCATION_CACHE_TIMEOUT',
+    default=5 if CACHES['default']['BACKEND'] in (
+        'django.core.cache.backends.locmem.LocMemCache', 'django.core.cache.backends.dummy.DummyCache',
+    ) else 3600,
+    cast=int,
+)
+
+# Сесії й request.user. SESSION_MODE:
+#   db             — таблиця django_session, запит на кожен запит із сесією (за замовчуванням);
+#   cached_db      — читання з кешу, запис і в кеш, і в БД; лише зі спільним
+#                    CACHES['default'] (Redis/Memcached) — з LocMem вихід скидає
+#                    сесію тільки в одному воркері, перевірка booking.E001 це забороняє;
+#   signed_cookies — сесія в підписаній cookie, БД не потрібна зовсім.
+# USER_CACHE_TIMEOUT > 0 вмикає кеш користувачів у процесі (booking.auth);
+# 0 (за замовчуванням) — звичайний запит до auth_user на кожен запит.
+# Вмикати лише зі спільним CACHES['default'] (Redis/Memcached): інвалідація
+# (зміна пароля, is_active=False) доходить до інших воркерів через версію в
+# цьому кеші. З LocMem кожен процес має свою версію, і інші воркери пускають
+# старі сесії ще до USER_CACHE_TIMEOUT секунд (перевірка booking.E002).
+SESSION_MODE = config('SESSION_MODE', default='db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_MODE]
+USER_CACHE_TIMEOUT = config('USER_CACHE_TIMEOUT', default=0, cast=int)
+USER_CACHE_SIZE = config('USER_CACHE_SIZE', default=1024, cast=int)
+
+# Максимум елементів у POST /booking/batch/ (booking.views.booking_batch).
+BOOKING_BATCH_MAX_ITEMS = config('BOOKING_BATCH_MAX_ITEMS', default=20, cast=int)
+
+# Ліміти запитів (booking.ratelimit): ключ — ім'я маршруту, rate — 'N/s|m|h|d'.
+# Лічильники живуть у кеші RATE_LIMIT_CACHE_ALIAS; для кількох воркерів він має
+# бути спільним (Redis/Memcached), інакше кожен процес рахує свій бюджет.
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+# IP клієнта — REMOTE_ADDR. За nginx/балансувальником це адреса проксі, і всі
+# клієнти ділили б один бюджет: перелічіть проксі (IP або мережі через кому),
+# тоді адреса береться з X-Forwarded-For, який вони виставляють.
+RATE_LIMIT_TRUSTED_PROXIES = config('RATE_LIMIT_TRUSTED_PROXIES', default='', cast=Csv())
+RATE_LIMIT_CACHE_ALIAS = 'default'
+RATE_LIMITS = {
+    'register': {'rate': config('RATE_LIMIT_REGISTER', default='5/h'), 'methods': ['POST']},
+    'activate': {'rate': config('RATE_LIMIT_ACTIVATE', default='20/h')},
+    'booking_create': {'rate': config('RATE_LIMIT_BOOKING', default='20/m'), 'methods': ['POST']},
+    'booking_batch': {'rate': config('RATE_LIMIT_BOOKING_BATCH', default='5/m'), 'methods': ['POST']},
+    'login': {'rate': config('RATE_LIMIT_LOGIN', default='10/m'), 'methods': ['POST']},
+    'location_ical': {'rate': config('RATE_LIMIT_FEEDS', default='120/m')},
+    'booking_changes': {'rate': config('RATE_LIMIT_FEEDS', default='120/m')},
+}
+
+# Фіди для партнерських каналів (booking.feeds): iCal локації і зміни з курсором.
+# Зміни молодші за SYNC_FEED_LAG_SECONDS віддаються наступним опитуванням. Це
+# захищає лише від транзакцій, коротших за затримку: довша транзакція запису може
+# закомітити рядок уже позаду курсора. Тому за замовчуванням затримка більша за
+# busy timeout SQLite (скільки запис може чекати на блокування); для PostgreSQL —
+# 10 с, або більше, якщо транзакції бронювання бувають довшими.
+# Сліди скасувань (BookingTombstone) старші за SYNC_FEED_RETENTION_DAYS видаляє
+# archive_bookings; курсор, старший за цей строк, отримує 410 — партнер має
+# синхронізуватись заново з порожнім since.
+SYNC_FEED_PAGE_SIZE = config('SYNC_FEED_PAGE_SIZE', default=1000, cast=int)
+SYNC_FEED_LAG_SECONDS = config(
+    'SYNC_FEED_LAG_SECONDS',
+    # 5000 мс — timeout модуля sqlite3 за замовчуванням (профіль sqlite-basic)
+    default=10 if DB_PROFILE == 'postgres' else SQLITE_PRAGMAS.get('busy_timeout', 5000) // 1000 + 2,
+    cast=int,
+)
+SYNC_FEED_RETENTION_DAYS = config('SYNC_FEED_RETENTION_DAYS', default=365, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -118,6 +259,26 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# ASSET_MODE=production: хешовані імена + .gz/.br під час collectstatic, а config.wsgi
+# сам віддає статику й медіа з довгим Cache-Control і відповідає 304 на умовні GET.
+ASSET_MODE = config('ASSET_MODE', default='debug')
+SERVE_ASSETS = ASSET_MODE == 'production'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'booking.storage.CompressedManifestStaticFilesStorage' if SERVE_ASSETS
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=3600, cast=int)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -130,7 +291,9 @@ LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Для офлайн-замірів: EMAIL_BACKEND=django.core.mail.backends.locmem.EmailBackend
+# або django.core.mail.backends.console.EmailBackend
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = 'smtp.ukr.net'
 EMAIL_PORT = 465
 EMAIL_USE_SSL = True
@@ -142,3 +305,14 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Похідні зображень (booking/images.py) генеруються у фоновому потоці
+IMAGE_DERIVATIVES_BACKGROUND = config('IMAGE_DERIVATIVES_BACKGROUND', default=True, cast=bool)
+
+# Метрики продуктивності (booking.middleware.PerformanceMiddleware, /metrics)
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=lambda v: [ip.strip() for ip in v.split(',') if ip.strip()])
+PERF_SLOW_LOG = config('PERF_SLOW_LOG', default=None)
+PERF_SLOW_LOG_SIZE = config('PERF_SLOW_LOG_SIZE', default=20, cast=int)
+
+# Під ASGI сторінки читання обслуговують async-view (config/urls_async.py)
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=True, cast=bool)
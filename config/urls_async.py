@@ -0,0 +1,17 @@
+"""
+URL configuration used under ASGI (see booking.middleware.AsyncViewsMiddleware).
+
+The read-heavy booking pages resolve to their async versions; every other
+route falls through to the regular config.urls.
+"""
+from django.urls import path
+
+from booking import async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('rooms/', async_views.room_list, name='room_list'),
+    path('rooms/<int:pk>/', async_views.location_detail, name='location_detail'),
+    path('rooms/<int:pk>/availability/', async_views.location_availability, name='location_availability'),
+] + sync_urlpatterns
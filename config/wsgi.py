@@ -14,3 +14,17 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.SERVE_ASSETS:
+    from booking.static_serving import AssetServer
+
+    application = AssetServer(
+        application,
+        static_url=settings.STATIC_URL,
+        static_root=settings.STATIC_ROOT,
+        media_url=settings.MEDIA_URL,
+        media_root=settings.MEDIA_ROOT,
+        media_max_age=settings.MEDIA_CACHE_MAX_AGE,
+    )